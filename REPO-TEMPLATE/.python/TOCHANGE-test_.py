@@ -3,6 +3,7 @@ import os
 import pytest
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from main import isprime
+from primes_oracle import PrimeBitset
 
 
 input_output = [(1, False), (2, True), (3, True), (4, False), (5, True),
@@ -17,3 +18,20 @@ input_output = [(1, False), (2, True), (3, True), (4, False), (5, True),
 @pytest.mark.parametrize("input,expected", input_output)
 def test(input, expected):
     assert isprime(input) == expected, input
+
+
+# Large generated vectors, checked in chunks to keep collection fast
+# Generate with: python .python/primes_oracle.py .python/primes.bits 0 1000000
+
+VECTORS = os.path.join(os.path.dirname(__file__), 'primes.bits')
+CHUNKS = 50
+
+if os.path.exists(VECTORS):
+
+    @pytest.mark.parametrize("chunk", range(CHUNKS))
+    def test_vectors(chunk):
+        with PrimeBitset(VECTORS) as bits:
+            size = -(-len(bits) // CHUNKS)
+            start = bits.start + chunk * size
+            for n, expected in bits.cases(start, min(start + size, bits.stop)):
+                assert isprime(n) == expected, n
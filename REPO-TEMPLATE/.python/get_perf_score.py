@@ -0,0 +1,137 @@
+# get_perf_score.py
+
+import sys
+import os
+import ast
+import json
+import math
+import time
+import importlib
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+from primes_oracle import isprime as reference_isprime
+
+
+# Time the student's function on inputs of growing size and fit the growth rate
+# The exponent k of time ~ n^k is the slope of log(time) against log(n):
+# Inputs are the largest primes below 10^3, 10^4, ... (worst case for trial division)
+# k <= TARGET_EXPONENT scores 1, k >= WORST_EXPONENT scores 0, linear in between
+# Only an exercise whose main.py defines the benchmarked function gets a score:
+# the others (any exercise rendered by generate_exercises.py) leave perf_score NULL
+
+
+SIZES = [10 ** k for k in range(3, 19)]
+MAX_CALL = 0.2       # seconds: stop growing the input once one call is this slow
+MIN_MEASURE = 0.005  # seconds: loop a call until one measurement lasts this long
+REPEAT = 5
+TARGET_EXPONENT = 0.6  # trial division up to sqrt(n), plus a margin for timing noise
+WORST_EXPONENT = 1.0   # trial division up to n
+BENCHMARKED = "main:isprime"  # the function these worst-case inputs are made for
+
+
+def has_benchmark(repo_dir=".", target=BENCHMARKED):
+    """True if the module of target defines its function, checked without importing it"""
+    module_name, function_name = target.split(":")
+    try:
+        with open(os.path.join(repo_dir, module_name + ".py"), encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+    except (OSError, SyntaxError, ValueError):
+        return False
+    return any(isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == function_name
+               for node in tree.body)
+
+
+def worst_case_input(size):
+    """Largest prime not above size: the slowest input for trial division"""
+    n = size
+    while not reference_isprime(n):
+        n -= 1
+    return n
+
+
+def time_call(func, arg, repeat=REPEAT):
+    """(best time of one call over several measurements, result of the warmup call)"""
+    start = time.perf_counter()
+    result = func(arg)
+    single = time.perf_counter() - start
+
+    number = max(1, int(MIN_MEASURE / single)) if single > 0 else 1000
+    best = single
+    for _ in range(repeat if single < MAX_CALL else 0):
+        start = time.perf_counter()
+        for _ in range(number):
+            func(arg)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best, result
+
+
+def growth_exponent(sizes, times):
+    """Least squares slope of log(time) against log(size)"""
+    xs = [math.log(s) for s in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in times]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    var = sum((x - mean_x) ** 2 for x in xs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var
+
+
+def benchmark(func):
+    """Timings of func on growing worst-case inputs, until one call exceeds MAX_CALL
+
+    Raises ValueError if func gets an input wrong: a fast wrong answer must not score.
+    """
+    sizes, times = [], []
+    for size in SIZES:
+        n = worst_case_input(size)
+        elapsed, result = time_call(func, n)
+        if not result:
+            raise ValueError(f"isprime({n}) should be True")
+        if func(n - 1):
+            raise ValueError(f"isprime({n - 1}) should be False")
+        sizes.append(size)
+        times.append(elapsed)
+        if elapsed >= MAX_CALL:
+            break
+    return sizes, times
+
+
+def perf_score(exponent):
+    if exponent <= TARGET_EXPONENT:
+        return 1.0
+    if exponent >= WORST_EXPONENT:
+        return 0.0
+    return (WORST_EXPONENT - exponent) / (WORST_EXPONENT - TARGET_EXPONENT)
+
+
+def score_function(func):
+    """(perf_score, timings) of a function; a function that fails scores 0"""
+    try:
+        sizes, times = benchmark(func)
+    except Exception as e:
+        return 0.0, {"error": repr(e)}
+    if len(sizes) < 3:
+        return 0.0, {"sizes": sizes, "times": times}
+    exponent = growth_exponent(sizes, times)
+    timings = {"sizes": sizes, "times": [round(t, 9) for t in times], "exponent": round(exponent, 3)}
+    return round(perf_score(exponent), 2), timings
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) > 2:
+        print("Usage: python get_perf_score.py [module:function]")
+        sys.exit(1)
+
+    if len(sys.argv) == 1 and not has_benchmark():
+        print(f"No {BENCHMARKED} in this exercise, no perf score")
+        sys.exit(0)
+
+    module_name, function_name = (sys.argv[1] if len(sys.argv) == 2 else BENCHMARKED).split(":")
+    try:
+        func = getattr(importlib.import_module(module_name), function_name)
+    except Exception as e:
+        print(f"0.00 , {json.dumps({'error': repr(e)})}")
+        sys.exit(0)
+
+    score, timings = score_function(func)
+    print(f"{score:.2f} , {json.dumps(timings, separators=(',', ':'))}")
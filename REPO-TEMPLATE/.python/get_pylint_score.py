@@ -0,0 +1,118 @@
+# get_pylint_score.py
+
+import os
+import sys
+import glob
+import tempfile
+import sysconfig
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Score files with pylint's API instead of parsing its text output
+# Interpreter and astroid startup dominate for small files, so many repos are
+# linted by a few long-lived workers, each keeping its astroid cache warm
+# Only the stdlib and installed packages stay cached between repos: a repo's own
+# modules (helper.py, ...) would otherwise resolve to another repo's copy
+
+
+def pylint_score(files, jobs=1):
+    """Pylint global note (out of 10) of files, or None if nothing was evaluated"""
+    from pylint.lint import Run
+    from pylint.reporters import CollectingReporter
+
+    args = ["--persistent=n", f"--jobs={jobs}", *files]
+    run = Run(args, reporter=CollectingReporter(), exit=False)
+    stats = run.linter.stats
+    if not getattr(stats, "statement", 0):
+        return None
+    return stats.global_note
+
+
+def forget_local_modules():
+    """Drop the astroid modules that are neither stdlib nor installed packages"""
+    from astroid import MANAGER
+
+    paths = sysconfig.get_paths()
+    kept = tuple({os.path.realpath(paths[name]) for name in ("stdlib", "platstdlib", "purelib", "platlib")})
+    for name, module in list(MANAGER.astroid_cache.items()):
+        path = getattr(module, "file", None)
+        if path and not os.path.realpath(path).startswith(kept):
+            del MANAGER.astroid_cache[name]
+    # Module name -> file lookups depend on the current directory too
+    MANAGER._mod_file_cache.clear()
+
+
+def repo_score(repo):
+    """Note of the top-level *.py files of a repo, linted from inside the repo"""
+    files = sorted(glob.glob(os.path.join(os.path.abspath(repo), "*.py")))
+    if not files:
+        return repo, None
+    cwd = os.getcwd()
+    os.chdir(repo)  # pick up the repo's own pylintrc, as in CI
+    try:
+        forget_local_modules()
+        return repo, pylint_score(files)
+    except Exception as e:
+        print(f"{repo}: {e}", file=sys.stderr)
+        return repo, None
+    finally:
+        os.chdir(cwd)
+
+
+def score_repos(repos, workers=None):
+    """Notes of many repos as {repo: note}, linted on a process pool"""
+    repos = list(repos)
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(repos) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(repo_score, repos, chunksize=chunksize))
+
+
+def self_check():
+    """Two repos with their own helper.py must score the same linted alone or in a row"""
+    with tempfile.TemporaryDirectory() as base:
+        repos = []
+        for name, function in (("a", "foo"), ("b", "bar")):
+            repo = os.path.join(base, name)
+            os.mkdir(repo)
+            with open(os.path.join(repo, "helper.py"), "w", encoding="utf-8") as f:
+                f.write(f'"""{name}"""\n\n\ndef {function}():\n    """{function}"""\n    return 1\n')
+            with open(os.path.join(repo, "main.py"), "w", encoding="utf-8") as f:
+                f.write(f'"""{name}"""\nfrom helper import {function}\n\nprint({function}())\n')
+            repos.append(repo)
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            alone = pool.submit(repo_score, repos[1]).result()[1]
+        # One process for both, as a score_repos worker does
+        in_a_row = [repo_score(repo)[1] for repo in repos]
+    print(f"b alone: {alone}, a then b: {in_a_row}")
+    return alone is not None and alone == in_a_row[1]
+
+
+def scaled(note):
+    """Note scaled to 0-1 with 2 decimals, as stored in the marks table"""
+    return None if note is None else round(note / 10, 2)
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) < 2:
+        print("Usage: python get_pylint_score.py <file.py> [...]")
+        print("       python get_pylint_score.py --repos <repo-dir> [...]")
+        print("       python get_pylint_score.py --self-check")
+        sys.exit(1)
+
+    if sys.argv[1] == "--self-check":
+        ok = self_check()
+        print("✅ repos linted independently" if ok else "❌ a repo's score depends on the repo linted before it")
+        sys.exit(0 if ok else 1)
+
+    if sys.argv[1] == "--repos":
+        for repo, note in sorted(score_repos(sys.argv[2:]).items()):
+            print(repo, ",", "" if note is None else f"{scaled(note):.2f}")
+        sys.exit(0)
+
+    note = pylint_score(sys.argv[1:], jobs=0 if len(sys.argv) > 2 else 1)
+    if note is None:
+        print("Failed to compute Pylint score.")
+        sys.exit(1)
+    print(f"{scaled(note):.2f}")
@@ -7,41 +7,78 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.'))
 
 
 # Parse the JUnit XML file and return the test results
+# The file is streamed with iterparse: each testcase is dropped once scored,
+# so memory stays flat whatever the number of tests
+# A test_ids list, if given, receives the `name` of each testcase, in status order
 
 
-def parse_junit_xml(file_path):
-    tree = ET.parse(file_path)
-    root = tree.getroot()
-    status_string = ""
+OUTCOMES = (("failure", "F"), ("error", "E"), ("skipped", "S"))
+
+
+def parse_junit_xml(file_path, test_ids=None):
+    status = bytearray()
     tests = 0
     failures = 0
     errors = 0
     skipped = 0
 
-    for testsuite in root.findall('testsuite'):
-
-        # Add up the test results from each testsuite
-
-        tests += int(testsuite.attrib.get('tests', 0))
-        failures += int(testsuite.attrib.get('failures', 0))
-        errors += int(testsuite.attrib.get('errors', 0))
-        skipped += int(testsuite.attrib.get('skipped', 0))
+    # Depth 0 is the root, 1 the testsuites, 2 the testcases and 3 their children
+    # A "sandbox" property at depth 4 (see sandbox.py) overrides the status: T or M
+    depth = -1
+    parents = []
+    children = set()
+    sandbox_status = None
+
+    for event, elem in ET.iterparse(file_path, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 1 and elem.tag == "testsuite":
+
+                # Add up the test results from each testsuite
+
+                tests += int(elem.attrib.get('tests', 0))
+                failures += int(elem.attrib.get('failures', 0))
+                errors += int(elem.attrib.get('errors', 0))
+                skipped += int(elem.attrib.get('skipped', 0))
+            elif depth == 2:
+                children.clear()
+                sandbox_status = None
+            elif depth == 3:
+                children.add(elem.tag)
+            elif depth == 4 and elem.tag == "property" and elem.attrib.get("name") == "sandbox":
+                sandbox_status = elem.attrib.get("value")
+            parents.append(elem)
+            continue
+
+        level = depth
+        depth -= 1
+        parents.pop()
 
         # Add a character to the status string for each testcase
 
-        for testcase in testsuite.findall('testcase'):
-            if any(child.tag == "failure" for child in testcase):
-                status_string += "F"
-            elif any(child.tag == "error" for child in testcase):
-                status_string += "E"
-            elif any(child.tag == "skipped" for child in testcase):
-                status_string += "S"
+        if level == 2 and elem.tag == "testcase" and parents[-1].tag == "testsuite":
+            if test_ids is not None:
+                test_ids.append(elem.attrib.get("name", ""))
+            if sandbox_status:
+                status.extend(sandbox_status.encode("ascii"))
             else:
-                status_string += "."
+                for tag, char in OUTCOMES:
+                    if tag in children:
+                        status.append(ord(char))
+                        break
+                else:
+                    status.append(ord("."))
+
+        # Free every element below the testsuites once it is processed
+
+        if level >= 2:
+            elem.clear()
+            if level == 2:
+                parents[-1].remove(elem)
 
     passed = tests - failures - errors - skipped
 
-    return tests, passed, failures, errors, skipped, status_string
+    return tests, passed, failures, errors, skipped, status.decode("ascii")
 
 
 def generate_grade(tests, passed):
@@ -0,0 +1,181 @@
+# grade.py
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+from get_pytest_score import generate_grade
+from timing import Trace
+import outcomes
+import grade_cache
+
+
+# Whole grading pipeline in one job: pytest, pylint, perf and upload
+# The tests and the benchmark run in children with time and memory limits
+# (sandbox.py), so a submission stuck in C code cannot hold the job; pylint
+# and the upload stay in this process
+# Each stage is timed (see timing.py); the timings are sent with the grade but
+# kept out of the cached FIELDS, since a cached grade was not measured again
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(HERE)
+TEST_FILE = os.path.join(HERE, "test_.py")
+PERF_TIMEOUT = 60  # seconds for the whole benchmark
+FIELDS = ["tests", "passed", "failures", "errors", "skipped", "grade", "status_string",
+          "pylint_score", "perf_score", "perf_timings"]
+CACHED_FIELDS = FIELDS + ["outcomes", "test_ids"]
+
+
+def run_tests(test_file=TEST_FILE, memory_mb=None, trace=None, test_ids=None):
+    """Run the tests in a sandbox child (see sandbox.py), returning the parse_junit_xml tuple"""
+    import sandbox
+
+    start = time.perf_counter()
+    # The child's limits hold even for code stuck in C, which SIGALRM cannot interrupt
+    logged = []
+    suites = sandbox.run_module(test_file, memory_mb=memory_mb or 0, outcomes=logged)
+    # Outcomes from the child's progress log (pytest_runtest_logreport, microsecond
+    # durations); the report's testcases only when nothing was collected
+    results = [(sandbox.junit_address(nodeid)[1], status, seconds) for nodeid, status, seconds in logged] or [
+        (case.get("name", ""), sandbox.testcase_status(case), float(case.get("time") or 0))
+        for suite in suites for case in suite.iter("testcase")
+    ]
+    if test_ids is not None:
+        test_ids.extend(name for name, _, _ in results)
+    if trace is not None:
+        # Only durations are logged: the tests are laid out one after the other
+        for name, status, seconds in results:
+            trace.add(name, start, seconds, category="test", status=status)
+            start += seconds
+
+    status_string = "".join(status for _, status, _ in results)
+    tests = len(status_string)
+    failures = sum(status_string.count(c) for c in "FTM")
+    errors = status_string.count("E")
+    skipped = status_string.count("S")
+    return tests, tests - failures - errors - skipped, failures, errors, skipped, status_string
+
+
+def run_pylint(repo_dir=REPO_DIR):
+    from get_pylint_score import pylint_score, scaled
+    files = sorted(os.path.join(repo_dir, f) for f in os.listdir(repo_dir) if f.endswith(".py"))
+    return scaled(pylint_score(files)) if files else None
+
+
+def run_perf(timeout=PERF_TIMEOUT, memory_mb=None):
+    """(perf_score, perf_timings), or (None, None) when the exercise has no benchmark"""
+    from get_perf_score import has_benchmark
+    from sandbox import set_limits, resource
+    if not has_benchmark(REPO_DIR):
+        return None, None
+    # In a child, as the tests: a benchmark stuck in C is killed at the timeout
+    try:
+        result = subprocess.run(
+            [sys.executable, os.path.join(HERE, "get_perf_score.py")], cwd=REPO_DIR,
+            capture_output=True, text=True, timeout=timeout, check=False,
+            preexec_fn=(lambda: set_limits(memory_mb, timeout)) if resource else None
+        )
+    except subprocess.TimeoutExpired:
+        return 0.0, {"error": f"timed out after {timeout}s"}
+    try:
+        score, timings = result.stdout.strip().splitlines()[-1].split(" , ", 1)
+        return float(score), json.loads(timings)
+    except (IndexError, ValueError):
+        return 0.0, {"error": f"benchmark exited with code {result.returncode}"}
+
+
+def grade(use_cache=True, memory_mb=None, trace=None):
+    """Scores of the repo as a dict of CACHED_FIELDS, from the grade cache when possible"""
+    trace = trace or Trace()
+    if use_cache:
+        with trace.span("cache"):
+            key = grade_cache.cache_key(REPO_DIR)
+            cached = grade_cache.load(key)
+        if cached is not None and all(field in cached for field in CACHED_FIELDS):
+            print("Reusing cached grade")
+            return cached
+    else:
+        key = grade_cache.cache_key(REPO_DIR)
+
+    test_ids = []
+    with trace.span("tests"):
+        tests, passed, failures, errors, skipped, status_string = run_tests(
+            memory_mb=memory_mb, trace=trace, test_ids=test_ids)
+    result = {
+        "tests": tests,
+        "passed": passed,
+        "failures": failures,
+        "errors": errors,
+        "skipped": skipped,
+        "grade": round(generate_grade(tests, passed), 2),
+        "status_string": status_string,
+        "outcomes": outcomes.encode(test_ids, status_string),
+        "test_ids": test_ids,
+    }
+    with trace.span("pylint"):
+        result["pylint_score"] = run_pylint()
+    with trace.span("perf"):
+        result["perf_score"], result["perf_timings"] = run_perf(memory_mb=memory_mb)
+    grade_cache.store(key, result)
+    return result
+
+
+def upload(result, timings=None):
+    """Send the grade with update_sb.py, when it and the Supabase secrets are available"""
+    if not os.environ.get("SUPABASE_URL") or not os.environ.get("SUPABASE_KEY"):
+        print("SUPABASE_URL/SUPABASE_KEY not set, grade not uploaded")
+        return
+    try:
+        import update_sb
+    except ImportError:
+        print("update_sb.py not found next to grade.py, grade not uploaded")
+        return
+    update_sb.main(result["grade"], result["status_string"], result["pylint_score"] or 0.0,
+                   result["perf_score"], result["perf_timings"], timings,
+                   result["outcomes"], result["test_ids"])
+
+
+def write_github_output(result, timings=None):
+    """Expose the scores as step outputs, as the former scoring jobs did"""
+    path = os.environ.get("GITHUB_OUTPUT")
+    if not path:
+        return
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(f"pytest_score={result['grade']:.2f}\n")
+        f.write(f"pytest_string={result['status_string']}\n")
+        f.write(f"pylint_score={result['pylint_score']}\n")
+        f.write(f"perf_score={'' if result['perf_score'] is None else result['perf_score']}\n")
+        if timings is not None:
+            f.write(f"timings={json.dumps(timings, separators=(',', ':'))}\n")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Grade this repo in one process and upload the result")
+    parser.add_argument("--no-upload", action="store_true", help="only print the scores")
+    parser.add_argument("--no-cache", action="store_true", help="ignore the grade cache")
+    parser.add_argument("--memory", type=int, default=1024, help="MB available to the tests")
+    parser.add_argument("--trace", metavar="FILE", help="write every timing span as a Chrome trace (chrome://tracing)")
+    args = parser.parse_args()
+
+    os.chdir(REPO_DIR)
+    trace = Trace()
+    with trace.span("grade"):
+        result = grade(use_cache=not args.no_cache, memory_mb=args.memory, trace=trace)
+    # The upload latency cannot be part of the row it sends: it is printed and traced only
+    timings = trace.summary()
+    print(json.dumps({field: result[field] for field in FIELDS}))
+    print("Timings (ms):", json.dumps(timings))
+    write_github_output(result, timings)
+    if not args.no_upload:
+        with trace.span("upload"):
+            upload(result, timings)
+        print(f"Upload took {trace.spans[-1]['ms']:.0f} ms")
+    if args.trace:
+        trace.dump(args.trace)
+        print(f"Trace written to {args.trace}")
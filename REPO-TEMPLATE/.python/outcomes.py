@@ -0,0 +1,68 @@
+# outcomes.py
+
+import base64
+import hashlib
+
+
+# Compact per-test outcomes, stored in the marks table next to pytest_string
+# Each test gets a 3-bit code (position in STATUSES). The codes are written
+# either two per byte (nibbles) or as runs of up to 32 equal codes per byte,
+# whichever is shorter: a mostly green suite of thousands of tests fits in a
+# few dozen bytes. The test ids (JUnit `name` attributes) are the same for a
+# whole cohort, so a row only carries their digest, the suite key; the list
+# itself is stored once in the test_suites table.
+
+
+STATUSES = ".FESTM"  # same characters as pytest_string, see parse_junit_xml
+FAILED = "FETM"      # outcomes counted as failures by the analytics
+NIBBLES = "n"
+RUNS = "r"
+MAX_RUN = 32
+
+
+def suite_digest(test_ids):
+    """Key of an ordered list of test ids"""
+    return hashlib.sha256("\n".join(test_ids).encode("utf-8")).hexdigest()[:16]
+
+
+def pack_nibbles(codes):
+    padded = codes + bytes(len(codes) % 2)
+    return bytes(padded[i] | padded[i + 1] << 4 for i in range(0, len(padded), 2))
+
+
+def pack_runs(codes):
+    packed = bytearray()
+    i = 0
+    while i < len(codes):
+        run = 1
+        while i + run < len(codes) and run < MAX_RUN and codes[i + run] == codes[i]:
+            run += 1
+        packed.append(codes[i] | (run - 1) << 3)
+        i += run
+    return bytes(packed)
+
+
+def encode(test_ids, status_string):
+    """{"suite", "n", "codes"} for the outcomes column"""
+    if len(test_ids) != len(status_string):
+        raise ValueError(f"{len(test_ids)} test ids for {len(status_string)} outcomes")
+    codes = bytes(STATUSES.index(c) for c in status_string)
+    nibbles, runs = pack_nibbles(codes), pack_runs(codes)
+    scheme, packed = (RUNS, runs) if len(runs) < len(nibbles) else (NIBBLES, nibbles)
+    return {
+        "suite": suite_digest(test_ids),
+        "n": len(codes),
+        "codes": scheme + base64.b64encode(packed).decode("ascii"),
+    }
+
+
+def decode(outcomes):
+    """Status string of an outcomes value"""
+    scheme, packed = outcomes["codes"][0], base64.b64decode(outcomes["codes"][1:])
+    if scheme == NIBBLES:
+        codes = [c for byte in packed for c in (byte & 15, byte >> 4)][:outcomes["n"]]
+    elif scheme == RUNS:
+        codes = [byte & 7 for byte in packed for _ in range((byte >> 3) + 1)]
+    else:
+        raise ValueError(f"unknown outcomes encoding {scheme!r}")
+    return "".join(STATUSES[c] for c in codes)
@@ -0,0 +1,151 @@
+# primes_oracle.py
+
+import os
+import sys
+import mmap
+import math
+import struct
+
+
+# Reference answers for isprime() test vectors
+# - a segmented sieve on bytearrays for ranges, in O(sqrt(stop)) memory per segment
+# - deterministic Miller-Rabin for any 64-bit integer
+# - compact bitset files (1 bit per integer) read back through mmap
+
+
+SEGMENT_SIZE = 1 << 20
+MR_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)  # exact below 3.3e24
+BITSET_MAGIC = b"PRIMEBIT"
+BITSET_HEADER = struct.Struct("<8sQQ")  # magic, start, stop
+
+
+def isprime(n):
+    """Deterministic Miller-Rabin primality test"""
+    if n < 2:
+        return False
+    for p in MR_BASES:
+        if n % p == 0:
+            return n == p
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in MR_BASES:
+        x = pow(a, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def small_primes(limit):
+    """Primes below limit with a plain sieve of Eratosthenes"""
+    sieve = bytearray([1]) * limit
+    sieve[:2] = b"\x00\x00"[:limit]
+    for p in range(2, math.isqrt(limit - 1) + 1 if limit > 1 else 0):
+        if sieve[p]:
+            sieve[p * p::p] = bytes(len(range(p * p, limit, p)))
+    return [p for p in range(limit) if sieve[p]]
+
+
+def segments(start, stop, segment_size=SEGMENT_SIZE):
+    """Yield (low, flags) where flags[i] is 1 if low + i is prime, for [start, stop)"""
+    base = small_primes(math.isqrt(max(stop - 1, 0)) + 1)
+    for low in range(start, stop, segment_size):
+        high = min(low + segment_size, stop)
+        flags = bytearray([1]) * (high - low)
+        for p in base:
+            first = max(p * p, (low + p - 1) // p * p)
+            if first >= high:
+                continue
+            flags[first - low::p] = bytes(len(range(first, high, p)))
+        for n in range(low, min(high, 2)):
+            flags[n - low] = 0
+        yield low, flags
+
+
+def primes_in_range(start, stop):
+    """Primes in [start, stop)"""
+    for low, flags in segments(start, stop):
+        yield from (low + i for i, flag in enumerate(flags) if flag)
+
+
+def write_bitset(path, start, stop):
+    """Store the primality of every integer in [start, stop) as one bit each"""
+    with open(path, "wb") as f:
+        f.write(BITSET_HEADER.pack(BITSET_MAGIC, start, stop))
+        carry = bytearray()
+        for _, flags in segments(start, stop, SEGMENT_SIZE):
+            carry += flags
+            whole = len(carry) // 8 * 8
+            f.write(pack_bits(carry[:whole]))
+            del carry[:whole]
+        if carry:
+            f.write(pack_bits(carry + bytes(8 - len(carry))))
+
+
+def pack_bits(flags):
+    """Pack 0/1 bytes (length multiple of 8) into bits, least significant first"""
+    # Each column holds one bit of every output byte; as a big integer, shifting
+    # it by the bit position never carries into the next byte
+    size = len(flags) // 8
+    packed = 0
+    for bit in range(8):
+        packed |= int.from_bytes(flags[bit::8], "little") << bit
+    return packed.to_bytes(size, "little")
+
+
+class PrimeBitset:
+    """Read-only view of a bitset file through mmap"""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.start, self.stop = BITSET_HEADER.unpack_from(self.map)
+        if magic != BITSET_MAGIC:
+            raise ValueError(f"{path} is not a prime bitset file")
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __contains__(self, n):
+        return self.start <= n < self.stop
+
+    def isprime(self, n):
+        if n not in self:
+            raise ValueError(f"{n} is outside [{self.start}, {self.stop})")
+        i = n - self.start
+        return bool(self.map[BITSET_HEADER.size + i // 8] >> (i % 8) & 1)
+
+    def cases(self, start=None, stop=None, step=1):
+        """(n, isprime) pairs for a sub-range"""
+        start = self.start if start is None else start
+        stop = self.stop if stop is None else stop
+        return ((n, self.isprime(n)) for n in range(start, stop, step))
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) != 4:
+        print("Usage: python primes_oracle.py <output.bits> <start> <stop>")
+        sys.exit(1)
+
+    output, start, stop = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+    write_bitset(output, start, stop)
+    print(f"{output}: [{start}, {stop}) in {os.path.getsize(output)} bytes")
@@ -0,0 +1,402 @@
+# sandbox.py
+
+import os
+import sys
+import time
+import signal
+import argparse
+import contextlib
+import tempfile
+import subprocess
+import xml.etree.ElementTree as ET
+import pytest
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, only the timeouts apply
+    resource = None
+
+
+# Run test modules in child processes with bounded time and memory
+# - each test gets a wall-clock timeout (SIGALRM), recorded as "T" in the status string
+# - the child gets an address space cap (RLIMIT_AS); a MemoryError is recorded as "M"
+# - the child gets a CPU cap (RLIMIT_CPU) and a wall-clock timeout for the whole module
+# - the runner follows the child's progress log and kills it when a test outlives its
+#   timeout by KILL_GRACE seconds: code stuck in C never sees SIGALRM
+# - the child logs each test's start and outcome; if it is killed, the finished
+#   outcomes are kept, the running test is recorded as T or M, and the remaining
+#   tests are run again in a new child, within the same module time budget
+# This file is both the runner (__main__) and the pytest plugin loaded in the child (-p sandbox)
+
+
+TEST_TIMEOUT = 5       # seconds per test
+MODULE_TIMEOUT = 300   # seconds per test module
+MEMORY_LIMIT = 1024    # MB per test module
+STATUS_PROPERTY = "sandbox"
+TIMEOUT, MEMORY = "T", "M"
+KILL_GRACE = 2         # seconds past the test timeout before the runner kills the child
+POLL_INTERVAL = 0.05   # seconds between two reads of the child's progress log
+
+
+class SandboxTimeout(BaseException):
+    """Raised in a test that exceeds its time; BaseException so `except Exception` can't swallow it"""
+
+
+# Plugin side
+
+
+def pytest_addoption(parser):
+    parser.addoption("--sandbox-timeout", type=float, default=TEST_TIMEOUT,
+                     help="wall-clock seconds per test (0 to disable)")
+    parser.addoption("--sandbox-progress", default=None, help="file receiving each test's start and outcome")
+    parser.addoption("--sandbox-skip", default=None, help="file of node ids not to run again")
+
+
+class Progress:
+    """Append-only log of collected tests, test starts and outcomes, for the runner"""
+
+    def __init__(self, path):
+        self.file = open(path, "a", encoding="utf-8")
+        self.status = {}
+        self.durations = {}
+
+    def write(self, *fields):
+        # One flushed line per event: it survives the child being killed
+        self.file.write("\t".join(fields) + "\n")
+        self.file.flush()
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, items):
+        for item in items:
+            self.write("collected", item.nodeid)
+
+    def pytest_runtest_logstart(self, nodeid):
+        self.write("start", nodeid)
+
+    def pytest_runtest_logreport(self, report):
+        self.durations[report.nodeid] = self.durations.get(report.nodeid, 0.0) + report.duration
+        if report.when == "call" and report.failed:
+            char = dict(report.user_properties).get(STATUS_PROPERTY) or "F"
+        elif report.failed:
+            char = "E"  # setup or teardown failure, as in JUnit
+        elif report.skipped:
+            char = "S"
+        else:
+            char = "."
+        # The first non-passing phase decides, as in the JUnit report
+        if self.status.get(report.nodeid, ".") == ".":
+            self.status[report.nodeid] = char
+
+    def pytest_runtest_logfinish(self, nodeid):
+        self.write("done", nodeid, self.status.get(nodeid, "."), f"{self.durations.get(nodeid, 0.0):.6f}")
+
+
+def pytest_configure(config):
+    path = config.getoption("--sandbox-progress")
+    if path:
+        config.pluginmanager.register(Progress(path), "sandbox-progress")
+
+
+def pytest_collection_modifyitems(config, items):
+    path = config.getoption("--sandbox-skip")
+    if not path:
+        return
+    with open(path, encoding="utf-8") as f:
+        skip = set(f.read().splitlines())
+    deselected = [item for item in items if item.nodeid in skip]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = [item for item in items if item.nodeid not in skip]
+
+
+def _on_alarm(signum, frame):
+    raise SandboxTimeout("test timed out")
+
+
+@contextlib.contextmanager
+def time_limit(seconds):
+    """Raise SandboxTimeout in the block after seconds of wall-clock time (main thread, Unix)"""
+    if not seconds or not hasattr(signal, "setitimer"):
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    with time_limit(item.config.getoption("--sandbox-timeout")):
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    if call.when != "call" or call.excinfo is None:
+        return
+    if call.excinfo.errisinstance(SandboxTimeout):
+        status = TIMEOUT
+    elif call.excinfo.errisinstance(MemoryError):
+        status = MEMORY
+    else:
+        return
+    # The call report for in-process collectors, the item for the JUnit writer
+    outcome.get_result().user_properties.append((STATUS_PROPERTY, status))
+    item.user_properties.append((STATUS_PROPERTY, status))
+
+
+# Runner side
+
+
+def set_limits(memory_mb, cpu_seconds):
+    """Apply rlimits to the current process; used as preexec_fn of the child"""
+    if resource is None:
+        return
+    if memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+
+
+def read_progress(path):
+    """(collected node ids, {node id: (status, seconds)} of finished tests, test running at the end)"""
+    collected, done, running = [], {}, None
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return collected, done, running
+    for line in lines:
+        fields = line.split("\t")
+        if fields[0] == "collected" and len(fields) == 2:
+            collected.append(fields[1])
+        elif fields[0] == "start" and len(fields) == 2:
+            running = fields[1]
+        elif fields[0] == "done" and len(fields) == 4:
+            done[fields[1]] = (fields[2], float(fields[3]))
+            running = None
+    return collected, done, running
+
+
+def junit_address(nodeid):
+    """(classname, name) that pytest's JUnit writer gives a node id"""
+    parts = nodeid.split("::")
+    path = parts[0][:-3] if parts[0].endswith(".py") else parts[0]
+    return ".".join([path.replace("/", ".").replace("\\", ".")] + parts[1:-1]), parts[-1]
+
+
+def testcase(nodeid, status, seconds=0.0, message=""):
+    """JUnit testcase of a test whose outcome came from the progress log"""
+    classname, name = junit_address(nodeid)
+    element = ET.Element("testcase", classname=classname, name=name, time=f"{seconds:.3f}")
+    if status in "FTM":
+        ET.SubElement(element, "failure", message=message or "test failed")
+    elif status == "E":
+        ET.SubElement(element, "error", message=message or "test error")
+    elif status == "S":
+        ET.SubElement(element, "skipped", message=message or "skipped")
+    if status in (TIMEOUT, MEMORY):
+        properties = ET.SubElement(element, "properties")
+        ET.SubElement(properties, "property", name=STATUS_PROPERTY, value=status)
+    return element
+
+
+def merged_suite(module, collected, cases, roots):
+    """One testsuite in collection order, from logged outcomes and the last child's report"""
+    reported = {}
+    for root in roots:
+        for suite in ([root] if root.tag == "testsuite" else list(root)):
+            for element in suite.iter("testcase"):
+                reported[(element.get("classname"), element.get("name"))] = element
+    suite = ET.Element("testsuite", name=module)
+    for nodeid in collected:
+        element = cases.get(nodeid)
+        if element is None:
+            element = reported.get(junit_address(nodeid))
+        if element is not None:
+            suite.append(element)
+    testcases = list(suite)
+    suite.set("tests", str(len(testcases)))
+    suite.set("failures", str(sum(1 for t in testcases if t.find("failure") is not None)))
+    suite.set("errors", str(sum(1 for t in testcases if t.find("error") is not None)))
+    suite.set("skipped", str(sum(1 for t in testcases if t.find("skipped") is not None)))
+    return suite
+
+
+def failed_suite(module, status, message):
+    """Testsuite with one failed testcase, for a module whose child was killed"""
+    suite = ET.Element("testsuite", name=module, tests="1", failures="1", errors="0", skipped="0")
+    testcase = ET.SubElement(suite, "testcase", classname=module, name="<module>")
+    ET.SubElement(testcase, "failure", message=message)
+    if status:
+        properties = ET.SubElement(testcase, "properties")
+        ET.SubElement(properties, "property", name=STATUS_PROPERTY, value=status)
+    return suite
+
+
+def watch(child, progress, deadline, test_timeout):
+    """Wait for the child, killing it at the deadline or when one test outlives
+    test_timeout + KILL_GRACE (a hang in C code never sees SIGALRM)
+
+    Returns why the child was killed, or None if it exited on its own.
+    """
+    position, running, since = 0, None, None
+    while child.poll() is None:
+        now = time.monotonic()
+        try:
+            with open(progress, encoding="utf-8") as f:
+                f.seek(position)
+                lines = f.read()
+        except OSError:
+            lines = ""
+        # Only whole lines: the child may be writing the last one
+        lines = lines[:lines.rfind("\n") + 1]
+        position += len(lines.encode("utf-8"))
+        for line in lines.splitlines():
+            fields = line.split("\t")
+            if fields[0] == "start":
+                running, since = fields[1], now
+            elif fields[0] == "done":
+                running = None
+        if now >= deadline:
+            reason = "module time limit reached"
+        elif test_timeout and running is not None and now - since > test_timeout + KILL_GRACE:
+            reason = f"test still running after {test_timeout + KILL_GRACE:g}s"
+        else:
+            time.sleep(POLL_INTERVAL)
+            continue
+        child.kill()
+        child.wait()
+        return reason
+    return None
+
+
+def run_child(module, tmp, timeout, test_timeout, memory_mb):
+    """Run the tests of a module not listed in the skip file, returning (JUnit root or None, status, message)"""
+    results_file = os.path.join(tmp, "results.xml")
+    if os.path.exists(results_file):
+        os.remove(results_file)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)), env.get("PYTHONPATH")]))
+    command = [sys.executable, "-m", "pytest", "-q", "-p", "sandbox", "-p", "no:cacheprovider",
+               f"--sandbox-timeout={test_timeout}", f"--junitxml={results_file}",
+               f"--sandbox-progress={os.path.join(tmp, 'progress')}", f"--sandbox-skip={os.path.join(tmp, 'skip')}",
+               module]
+    cpu_seconds = max(1, int(timeout))
+    child = subprocess.Popen(
+        command, env=env,
+        preexec_fn=(lambda: set_limits(memory_mb, cpu_seconds)) if resource else None
+    )
+    killed = watch(child, os.path.join(tmp, "progress"), time.monotonic() + timeout, test_timeout)
+    if killed:
+        return None, TIMEOUT, killed
+
+    if os.path.exists(results_file):
+        return ET.parse(results_file).getroot(), None, ""
+    # Killed by a signal: SIGXCPU is the CPU cap, anything else is taken as memory
+    if child.returncode == -getattr(signal, "SIGXCPU", 0):
+        return None, TIMEOUT, "CPU time limit reached"
+    if child.returncode < 0:
+        return None, MEMORY, f"child killed by signal {-child.returncode}"
+    return None, None, f"child exited with code {child.returncode}"
+
+
+def run_module(module, test_timeout=TEST_TIMEOUT, module_timeout=MODULE_TIMEOUT, memory_mb=MEMORY_LIMIT,
+               outcomes=None):
+    """Run one test module in limited children, returning its testsuite elements
+
+    A killed child costs only the test it was running: the tests it finished
+    keep their outcome and the others run in a new child, until the module's
+    time is spent. Tests left unrun then are recorded as timeouts.
+    An outcomes list receives (node id, status, seconds) of each test from the
+    progress log, in collection order; it stays empty if nothing was collected.
+    """
+    deadline = time.monotonic() + module_timeout
+    with tempfile.TemporaryDirectory() as tmp:
+        progress, skip_file = os.path.join(tmp, "progress"), os.path.join(tmp, "skip")
+        open(skip_file, "w", encoding="utf-8").close()
+        collected, cases, root = None, {}, None
+        logged = {}  # node id -> (status, seconds), over all the children
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                status, message = TIMEOUT, f"module timed out after {module_timeout}s"
+                break
+            started = time.monotonic()
+            root, status, message = run_child(module, tmp, remaining, test_timeout, memory_mb)
+            listed, done, running = read_progress(progress)
+            if collected is None:
+                collected = listed
+            logged.update(done)
+            if root is not None:
+                if not cases:
+                    report_outcomes(outcomes, collected, logged)
+                    return [root] if root.tag == "testsuite" else list(root)
+                break
+            if not collected:
+                # Killed while collecting: no test to blame
+                return [failed_suite(module, status, message)]
+
+            new = [nodeid for nodeid in done if nodeid not in cases]
+            for nodeid in new:
+                cases[nodeid] = testcase(nodeid, *done[nodeid])
+            if running is not None and running not in cases:
+                # Charged with the child's time after the last finished test
+                seconds = time.monotonic() - started - sum(done[nodeid][1] for nodeid in new)
+                logged[running] = (status or "F", max(0.0, seconds))
+                cases[running] = testcase(running, *logged[running], message)
+            elif not new:
+                break  # no progress: the rest would die the same way
+            with open(skip_file, "w", encoding="utf-8") as f:
+                f.write("".join(nodeid + "\n" for nodeid in cases))
+            os.remove(progress)
+
+        for nodeid in collected:
+            if root is None and nodeid not in cases:
+                logged[nodeid] = (status or "F", 0.0)
+                cases[nodeid] = testcase(nodeid, status or "F", message=f"not run: {message}")
+        report_outcomes(outcomes, collected, logged)
+        return [merged_suite(module, collected, cases, [root] if root is not None else [])]
+
+
+def report_outcomes(outcomes, collected, logged):
+    if outcomes is not None:
+        outcomes.extend((nodeid,) + logged[nodeid] for nodeid in collected if nodeid in logged)
+
+
+def testcase_status(element):
+    """Status character of a JUnit testcase, as parse_junit_xml gives it"""
+    for prop in element.iter("property"):
+        if prop.get("name") == STATUS_PROPERTY:
+            return prop.get("value")
+    for tag, char in (("failure", "F"), ("error", "E"), ("skipped", "S")):
+        if element.find(tag) is not None:
+            return char
+    return "."
+
+
+def run(modules, results_file, **limits):
+    """Run test modules one child at a time and merge their results in one JUnit file"""
+    merged = ET.Element("testsuites")
+    for module in modules:
+        merged.extend(run_module(module, **limits))
+    ET.ElementTree(merged).write(results_file, encoding="utf-8", xml_declaration=True)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Run test modules with time and memory limits")
+    parser.add_argument("modules", nargs="+", help="test files to run, each in its own child process")
+    parser.add_argument("--junitxml", default="results.xml", help="merged JUnit results file")
+    parser.add_argument("--timeout", type=float, default=TEST_TIMEOUT, help=f"seconds per test (default: {TEST_TIMEOUT})")
+    parser.add_argument("--module-timeout", type=int, default=MODULE_TIMEOUT, help=f"seconds per module (default: {MODULE_TIMEOUT})")
+    parser.add_argument("--memory", type=int, default=MEMORY_LIMIT, help=f"MB per module (default: {MEMORY_LIMIT})")
+    args = parser.parse_args()
+
+    run(args.modules, args.junitxml, test_timeout=args.timeout,
+        module_timeout=args.module_timeout, memory_mb=args.memory)
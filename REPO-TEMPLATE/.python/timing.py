@@ -0,0 +1,66 @@
+# timing.py
+
+import json
+import time
+from contextlib import contextmanager
+
+
+# Timing spans of the grading stages (tests, pylint, perf, upload)
+# summary() is the compact blob sent with the grade; dump() writes every span,
+# per-test ones included, in the Chrome trace event format (chrome://tracing,
+# https://ui.perfetto.dev)
+
+
+SLOWEST = 5  # per-test durations kept in the summary
+
+
+class Trace:
+    """Named spans, in milliseconds from the trace start"""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans = []
+
+    def add(self, name, start, duration, category="stage", **args):
+        """Record a span from perf_counter() start and duration in seconds"""
+        self.spans.append({
+            "name": name,
+            "cat": category,
+            "start_ms": (start - self.origin) * 1000,
+            "ms": duration * 1000,
+            "args": args,
+        })
+
+    @contextmanager
+    def span(self, name, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter() - start, **args)
+
+    def summary(self):
+        """{stage: ms} plus the slowest tests, small enough for one jsonb column"""
+        stages = {s["name"]: round(s["ms"], 1) for s in self.spans if s["cat"] == "stage"}
+        tests = sorted((s for s in self.spans if s["cat"] == "test"), key=lambda s: -s["ms"])
+        if tests:
+            stages["test_count"] = len(tests)
+            stages["slowest"] = [[s["name"], round(s["ms"], 1)] for s in tests[:SLOWEST]]
+        return stages
+
+    def dump(self, path):
+        events = [
+            {
+                "name": s["name"],
+                "cat": s["cat"],
+                "ph": "X",
+                "ts": round(s["start_ms"] * 1000),
+                "dur": round(s["ms"] * 1000),
+                "pid": 1,
+                "tid": 1 if s["cat"] == "stage" else 2,
+                "args": s["args"],
+            }
+            for s in self.spans
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
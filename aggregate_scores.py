@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Score many JUnit results files in parallel and write them as one table
+
+Usage:
+    python aggregate_scores.py ../repos/ -o scores.csv
+    python aggregate_scores.py '../repos/*/.python/results.xml' -o scores.parquet -j 8
+
+Each results file belongs to one student repo: the repo is the directory
+holding `.python/` (or the file's directory), and the actor is the repo name
+without the prefix shared by every repo (GitHub Classroom names repos
+`<assignment>-<login>`).
+"""
+import os
+import sys
+import csv
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'REPO-TEMPLATE', '.python'))
+from get_pytest_score import parse_junit_xml, generate_grade
+
+
+COLUMNS = ["actor", "repo", "tests", "passed", "failures", "errors", "skipped", "grade", "status_string"]
+
+
+def find_results(sources, name="results.xml"):
+    """Expand directories (searched recursively) and glob patterns into files"""
+    files = []
+    for source in sources:
+        if os.path.isdir(source):
+            # os.walk rather than a ** glob, which skips hidden dirs like .python/
+            for directory, _, filenames in os.walk(source):
+                if name in filenames:
+                    files.append(os.path.join(directory, name))
+        else:
+            files.extend(glob.glob(source, recursive=True))
+    return sorted(set(files))
+
+
+def repo_name(results_file):
+    """Name of the student repo a results file belongs to"""
+    directory = os.path.dirname(os.path.abspath(results_file))
+    if os.path.basename(directory) == ".python":
+        directory = os.path.dirname(directory)
+    return os.path.basename(directory)
+
+
+def actor_names(repos):
+    """Map each repo to its actor by stripping the prefix common to all repos"""
+    if len(repos) < 2:
+        return {repo: repo for repo in repos}
+    prefix = os.path.commonprefix(list(repos))
+    prefix = prefix[:prefix.rfind("-") + 1]
+    return {repo: repo[len(prefix):] or repo for repo in repos}
+
+
+def score_file(results_file):
+    """Score one results file, returning a row without the actor"""
+    try:
+        tests, passed, failures, errors, skipped, status_string = parse_junit_xml(results_file)
+    except Exception as e:
+        print(f"❌ {results_file}: {e}", file=sys.stderr)
+        return None
+    return {
+        "repo": repo_name(results_file),
+        "tests": tests,
+        "passed": passed,
+        "failures": failures,
+        "errors": errors,
+        "skipped": skipped,
+        "grade": round(generate_grade(tests, passed), 2),
+        "status_string": status_string,
+    }
+
+
+def score_files(files, workers=None):
+    """Score files on a process pool and fill in the actor column"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        rows = [row for row in pool.map(score_file, files, chunksize=16) if row]
+    actors = actor_names({row["repo"] for row in rows})
+    for row in rows:
+        row["actor"] = actors[row["repo"]]
+    return rows
+
+
+def write_table(rows, output, columns=COLUMNS):
+    """Write rows as Parquet if the output ends with .parquet, CSV otherwise"""
+    if output.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.table({column: [row.get(column) for row in rows] for column in columns})
+        pq.write_table(table, output)
+        return
+
+    with open(output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate JUnit results of many repos into one table")
+    parser.add_argument("sources", nargs="+", help="directories to search or glob patterns of results files")
+    parser.add_argument("-o", "--output", default="scores.csv", help="output .csv or .parquet file")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    files = find_results(args.sources)
+    if not files:
+        print("No results file found")
+        sys.exit(1)
+
+    rows = score_files(files, args.jobs)
+    rows.sort(key=lambda row: row["repo"])
+    write_table(rows, args.output)
+    print(f"✅ {len(rows)}/{len(files)} results files scored → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
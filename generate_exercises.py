@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Generate exercise repos from REPO-TEMPLATE and a spec file
+
+Usage:
+    python generate_exercises.py exercises.json -o ../exercises/ [-j N] [--force]
+
+The spec is a JSON list of exercises (or {"exercises": [...]}):
+
+    {
+      "name": "04-primes",                      # output folder
+      "title": "Nombres premiers",
+      "function": "isprime",
+      "signature": "p",
+      "imports": ["from math import sqrt"],     # optional, top of main.py
+      "readme": "Un nombre premier ...",        # or "readme_file": "primes.md"
+      "main_body": "for n in range(100): ...",  # optional, body of main()
+      "tests": [[1, false], [2, true]],         # (input, expected) vectors
+      "oracle": "primes_oracle:isprime",        # or expected values from an oracle
+      "inputs": [1, 2, 3] | {"range": [0, 100]} # ... called on these inputs
+    }
+
+`main.py`, `README.md` and `.python/test_.py` are rendered from the spec, in
+the layout of the TOCHANGE-* files. Every other template file is shared: it
+is stored once under `<output>/.store/` by content hash and hard-linked into
+each exercise (copied if the filesystem refuses links). Tools that rewrite
+files by rename, like replace_files.py, replace a link without touching the
+other exercises. `<output>/.store/manifest.json` records a digest of each
+exercise's spec and template, so a re-run only regenerates stale exercises.
+"""
+import os
+import sys
+import json
+import shutil
+import pprint
+import hashlib
+import argparse
+import importlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "REPO-TEMPLATE")
+GENERATOR_VERSION = "1"  # bump when the rendering below changes
+RENDERED = {
+    "TOCHANGE-main.py": "main.py",
+    "TOCHANGE-README.md": "README.md",
+    os.path.join(".python", "TOCHANGE-test_.py"): os.path.join(".python", "test_.py"),
+}
+SKIPPED_DIRS = {"__pycache__", ".git", ".pytest_cache"}
+
+MAIN_TEMPLATE = '''{imports}#### Fonction secondaire
+
+
+def {function}({signature}):
+
+    # votre code ici
+
+    pass
+
+#### Fonction principale
+
+
+def main():
+
+    # vos appels à la fonction secondaire ici
+
+{main_body}
+
+
+if __name__ == "__main__":
+    main()
+'''
+
+TEST_TEMPLATE = '''import sys
+import os
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from main import {function}
+
+
+input_output = {vectors}
+
+
+@pytest.mark.parametrize("input,expected", input_output)
+def test(input, expected):
+    assert {function}({call}) == expected, input
+'''
+
+
+def digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def template_files(template_dir=TEMPLATE_DIR):
+    """Paths, relative to the template, of every file to ship"""
+    files = []
+    for directory, dirnames, filenames in os.walk(template_dir):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIPPED_DIRS)
+        for name in sorted(filenames):
+            files.append(os.path.relpath(os.path.join(directory, name), template_dir))
+    return files
+
+
+def fill_store(template_dir, store):
+    """Copy the shared template files into the content-addressed store
+
+    Returns {relative path: store path}. The file mode is part of the key, so
+    an executable script and a plain file with the same bytes stay distinct.
+    """
+    os.makedirs(store, exist_ok=True)
+    shared = {}
+    for rel in template_files(template_dir):
+        if rel in RENDERED:
+            continue
+        source = os.path.join(template_dir, rel)
+        mode = os.stat(source).st_mode & 0o777
+        with open(source, "rb") as f:
+            data = f.read()
+        target = os.path.join(store, f"{digest(data)}-{mode:o}")
+        if not os.path.exists(target):
+            write_atomic(target, data, mode)
+        shared[rel] = target
+    return shared
+
+
+def write_atomic(path, data, mode=0o644):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.chmod(tmp, mode)
+    os.replace(tmp, path)
+
+
+def link(source, target):
+    """Hard-link source to target (replacing it), copying across filesystems"""
+    if os.path.exists(target) and os.path.samefile(source, target):
+        return False
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = target + ".tmp"
+    try:
+        os.link(source, tmp)
+    except OSError:
+        shutil.copy2(source, tmp)
+    os.replace(tmp, target)
+    return True
+
+
+def load_oracle(reference, search_paths):
+    """Function named by 'module:function', imported from the template or spec folder"""
+    module_name, _, function = reference.partition(":")
+    sys.path[:0] = search_paths
+    try:
+        return getattr(importlib.import_module(module_name), function)
+    finally:
+        del sys.path[:len(search_paths)]
+
+
+def expand_inputs(inputs):
+    if isinstance(inputs, dict) and "range" in inputs:
+        return list(range(*inputs["range"]))
+    return list(inputs)
+
+
+def test_vectors(exercise, search_paths):
+    """(input, expected) pairs, from the spec or computed with the oracle"""
+    if "oracle" in exercise:
+        oracle = load_oracle(exercise["oracle"], search_paths)
+        unpack = "," in exercise.get("signature", "")
+        return [(i, oracle(*i) if unpack else oracle(i)) for i in expand_inputs(exercise["inputs"])]
+    return [tuple(pair) for pair in exercise.get("tests", [])]
+
+
+def readme_parts(template_dir):
+    """(header before the title, to-do section) of the template README"""
+    with open(os.path.join(template_dir, "TOCHANGE-README.md"), encoding="utf-8") as f:
+        text = f.read()
+    title = text.find("\n# ")
+    todo = text.find("<!-- Begin todo -->")
+    return text[:title + 1] if title >= 0 else "", text[todo:] if todo >= 0 else ""
+
+
+def indent(code, prefix="    "):
+    return "\n".join(prefix + line if line.strip() else "" for line in code.strip("\n").splitlines())
+
+
+def render(exercise, template_dir, spec_dir):
+    """Rendered files of one exercise as {relative path: bytes}"""
+    function = exercise["function"]
+    signature = exercise.get("signature", "")
+    vectors = test_vectors(exercise, [os.path.join(template_dir, ".python"), spec_dir])
+
+    imports = "".join(line + "\n" for line in exercise.get("imports", []))
+    if imports:
+        imports += "\n"
+    main_body = exercise.get("main_body") or "\n".join(
+        f"print({function}({'*' if ',' in signature else ''}{i!r}))" for i, _ in vectors[:3]
+    ) or "pass"
+    main_py = MAIN_TEMPLATE.format(imports=imports, function=function, signature=signature,
+                                   main_body=indent(main_body))
+
+    test_py = TEST_TEMPLATE.format(
+        function=function,
+        # Continuation lines aligned under the opening bracket, as in TOCHANGE-test_.py
+        vectors=pprint.pformat(vectors, width=84, compact=True).replace("\n ", "\n" + " " * 16),
+        call="*input" if "," in signature else "input",
+    )
+
+    if "readme_file" in exercise:
+        with open(os.path.join(spec_dir, exercise["readme_file"]), encoding="utf-8") as f:
+            body = f.read()
+    else:
+        body = exercise.get("readme", "")
+    header, todo = readme_parts(template_dir)
+    readme = f"{header}# {exercise.get('title', exercise['name'])}\n\n{body.strip()}\n\n{todo}"
+
+    return {
+        "main.py": main_py.encode("utf-8"),
+        "README.md": readme.encode("utf-8"),
+        os.path.join(".python", "test_.py"): test_py.encode("utf-8"),
+    }
+
+
+def exercise_key(exercise, shared, template_dir, spec_dir):
+    """Digest of everything an exercise is generated from (an oracle's code excepted)"""
+    h = hashlib.sha256(GENERATOR_VERSION.encode())
+    h.update(json.dumps(exercise, sort_keys=True).encode())
+    if "readme_file" in exercise:
+        with open(os.path.join(spec_dir, exercise["readme_file"]), "rb") as f:
+            h.update(f.read())
+    for rel in sorted(shared):
+        h.update(f"{rel}\0{os.path.basename(shared[rel])}\0".encode())
+    for rel in sorted(RENDERED):
+        with open(os.path.join(template_dir, rel), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def generate(exercise, output_dir, shared, template_dir, spec_dir, previous_files):
+    """Write one exercise, returning (name, files written, files kept, file list)"""
+    target_dir = os.path.join(output_dir, exercise["name"])
+    written = kept = 0
+
+    for rel, store_path in shared.items():
+        if link(store_path, os.path.join(target_dir, rel)):
+            written += 1
+        else:
+            kept += 1
+
+    for rel, data in render(exercise, template_dir, spec_dir).items():
+        path = os.path.join(target_dir, rel)
+        try:
+            with open(path, "rb") as f:
+                unchanged = f.read() == data
+        except OSError:
+            unchanged = False
+        if unchanged:
+            kept += 1
+        else:
+            write_atomic(path, data)
+            written += 1
+
+    files = sorted(list(shared) + [RENDERED[rel] for rel in RENDERED])
+    # Files generated by a previous template but no longer part of it
+    for rel in set(previous_files) - set(files):
+        try:
+            os.remove(os.path.join(target_dir, rel))
+        except OSError:
+            pass
+    return exercise["name"], written, kept, files
+
+
+def load_spec(path):
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    exercises = spec["exercises"] if isinstance(spec, dict) else spec
+    names = [e["name"] for e in exercises]
+    duplicates = {n for n in names if names.count(n) > 1}
+    if duplicates:
+        raise ValueError(f"duplicate exercise name(s): {', '.join(sorted(duplicates))}")
+    return exercises
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate exercise repos from REPO-TEMPLATE and a spec file")
+    parser.add_argument("spec", help="JSON spec of the exercises")
+    parser.add_argument("-o", "--output", default="../exercises/", help="folder receiving one repo per exercise")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--template", default=TEMPLATE_DIR, help="template folder (default: REPO-TEMPLATE)")
+    parser.add_argument("--force", action="store_true", help="regenerate every exercise")
+    args = parser.parse_args()
+
+    try:
+        exercises = load_spec(args.spec)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ Invalid spec: {e}")
+        sys.exit(2)
+    spec_dir = os.path.dirname(os.path.abspath(args.spec))
+    store = os.path.join(args.output, ".store")
+    manifest_path = os.path.join(store, "manifest.json")
+
+    shared = fill_store(args.template, store)
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    keys = {e["name"]: exercise_key(e, shared, args.template, spec_dir) for e in exercises}
+    stale = [
+        e for e in exercises
+        if args.force or manifest.get(e["name"], {}).get("key") != keys[e["name"]]
+        or not os.path.isdir(os.path.join(args.output, e["name"]))
+    ]
+    print(f"🚀 {len(exercises)} exercise(s), {len(stale)} to (re)generate")
+
+    failed = []
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {
+            e["name"]: pool.submit(generate, e, args.output, shared, args.template, spec_dir,
+                                   manifest.get(e["name"], {}).get("files", []))
+            for e in stale
+        }
+        for name, future in futures.items():
+            try:
+                name, written, kept, files = future.result()
+            except Exception as e:
+                print(f"❌ {name}: {e}")
+                failed.append(name)
+                continue
+            manifest[name] = {"key": keys[name], "files": files}
+            print(f"📂 {name}: {written} file(s) written, {kept} unchanged")
+
+    write_atomic(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+    print(f"✅ {len(stale) - len(failed)} generated, {len(exercises) - len(stale)} up to date → {args.output}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
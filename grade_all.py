@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Grade every student repo locally, like the CI workflow does for one repo
+
+Usage:
+    python grade_all.py                      # ../repos/ → grades.csv
+    python grade_all.py ../repos/ -o grades.parquet -j 8
+
+For each git repo under the base directory, runs `.python/test_.py` with
+pytest (at most `-j` repos at a time) and lints the top-level `*.py` files
+with pylint's API on `-j` worker processes. Scores use the same parse_junit_xml/generate_grade logic as CI,
+and are cached by grade_cache: unchanged repos are not regraded.
+"""
+import os
+import sys
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'REPO-TEMPLATE', '.python')
+sys.path.insert(0, TEMPLATE_DIR)
+from aggregate_scores import COLUMNS, actor_names, write_table
+from get_pytest_score import parse_junit_xml, generate_grade
+from get_pylint_score import score_repos, scaled
+import grade_cache
+
+
+BASE_DIR = "../repos/"
+TEST_FILE = os.path.join(".python", "test_.py")
+TEST_TIMEOUT = 300  # seconds per repo
+SANDBOX = os.path.join(TEMPLATE_DIR, "sandbox.py")
+GRADE_COLUMNS = COLUMNS + ["pylint_score"]
+
+
+def find_repos(base_dir):
+    """Git repos directly under base_dir, as in update-all.sh"""
+    return sorted(
+        os.path.join(base_dir, name) for name in os.listdir(base_dir)
+        if os.path.isdir(os.path.join(base_dir, name, ".git"))
+    )
+
+
+def run_pytest(repo, results_file):
+    """Run the repo tests in the sandbox, writing JUnit results; False if nothing was reported
+
+    A test that loops or exhausts memory is recorded as T or M by the sandbox
+    instead of stalling the worker.
+    """
+    try:
+        subprocess.run(
+            [sys.executable, SANDBOX, TEST_FILE, f"--junitxml={results_file}",
+             f"--module-timeout={TEST_TIMEOUT}"],
+            cwd=repo, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            timeout=TEST_TIMEOUT + 30, check=False
+        )
+    except subprocess.TimeoutExpired:
+        return False
+    return os.path.exists(results_file)
+
+
+def grade_repo(repo, use_cache=True):
+    """Test one repo, returning (cache key, row of the grades table, cached)
+
+    Repos whose graded files match an already graded submission reuse its scores.
+    """
+    name = os.path.basename(os.path.normpath(repo))
+    key = grade_cache.cache_key(repo)
+    if use_cache:
+        cached = grade_cache.load(key)
+        if cached is not None:
+            return key, dict(cached, repo=name), True
+
+    row = {"repo": name}
+    with tempfile.TemporaryDirectory() as tmp:
+        results_file = os.path.join(tmp, "results.xml")
+        if run_pytest(os.path.abspath(repo), results_file):
+            tests, passed, failures, errors, skipped, status_string = parse_junit_xml(results_file)
+            row.update({
+                "tests": tests,
+                "passed": passed,
+                "failures": failures,
+                "errors": errors,
+                "skipped": skipped,
+                "grade": round(generate_grade(tests, passed), 2),
+                "status_string": status_string,
+            })
+        else:
+            row["grade"] = 0.0
+    return key, row, False
+
+
+def grade_all(repos, workers, use_cache=True):
+    """Grade repos: pytest on a bounded pool of child processes, then pylint in-process
+
+    Pylint runs through get_pylint_score on a process pool, so interpreter
+    and astroid startup are paid once per worker rather than once per repo.
+    """
+    graded = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(grade_repo, repo, use_cache): repo for repo in repos}
+        for future in as_completed(futures):
+            try:
+                graded[futures[future]] = future.result()
+            except Exception as e:
+                print(f"❌ {futures[future]}: {e}")
+
+    to_lint = [repo for repo, (_, _, cached) in graded.items() if not cached]
+    notes = score_repos(to_lint, workers) if to_lint else {}
+
+    rows = []
+    for repo, (key, row, cached) in sorted(graded.items()):
+        if not cached:
+            row["pylint_score"] = scaled(notes.get(repo))
+            # A run that produced no report (timeout, crash) is not worth reusing
+            if "tests" in row:
+                grade_cache.store(key, row)
+        suffix = " (cached)" if cached else ""
+        print(f"✅ {row['repo']}: pytest {row['grade']:.2f}, pylint {row['pylint_score']}{suffix}")
+        rows.append(row)
+
+    actors = actor_names({row["repo"] for row in rows})
+    for row in rows:
+        row["actor"] = actors[row["repo"]]
+    rows.sort(key=lambda row: row["repo"])
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grade every student repo locally")
+    parser.add_argument("base_dir", nargs="?", default=BASE_DIR, help=f"directory of repos (default: {BASE_DIR})")
+    parser.add_argument("-o", "--output", default="grades.csv", help="output .csv or .parquet file")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="repos graded at once (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="regrade even the repos already graded")
+    args = parser.parse_args()
+
+    repos = find_repos(args.base_dir)
+    if not repos:
+        print(f"No git repo found in {args.base_dir}")
+        sys.exit(1)
+
+    rows = grade_all(repos, args.jobs, not args.no_cache)
+    write_table(rows, args.output, GRADE_COLUMNS)
+    print(f"\n🎉 {len(rows)}/{len(repos)} repos graded → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Propagate a template file to many repos, touching only files that change
+
+Usage:
+    # Whole-file replace (replace-files.sh)
+    python replace_files.py '../repos/*/.github/workflows/ci.yml' REPO-TEMPLATE/.github/workflows/ci.yml
+    python replace_files.py '../repos/*/.python/get_pytest_score.py' REPO-TEMPLATE/.python/get_pytest_score.py --replace
+
+    # Replace after markers (replace-after-marker.sh), several pairs in one pass
+    python replace_files.py '../repos/*/README.md' --marker '## Consignes' consignes.md \
+                                                    --marker '## Barème' bareme.md --replace
+
+Dry run by default: each file that would change is listed with its +/- line
+counts (`--diff` prints the unified diff). With `--replace`, files are written
+atomically (temp file and rename) on a pool of `-j` threads. A target whose
+content already matches is skipped, so the `update_all.py push` that follows
+only commits real changes.
+
+In marker mode, each marker is a regex matched against whole lines, as with
+awk. The marker line is kept and everything after it, up to the next marker
+of the pass (or the end of the file), becomes the replacement file's content.
+"""
+import os
+import re
+import sys
+import glob
+import difflib
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+
+DEFAULT_JOBS = 8
+
+
+def replace_after_markers(text, markers):
+    """Text with the part after each (regex, replacement) marker replaced
+
+    Returns (new text, list of markers not found).
+    """
+    lines = text.splitlines(keepends=True)
+    found = {}
+    for index, line in enumerate(lines):
+        for position, (pattern, _) in enumerate(markers):
+            if position not in found and pattern.search(line):
+                found[position] = index
+                break
+
+    cuts = sorted((index, position) for position, index in found.items())
+    parts = [] if not cuts else lines[:cuts[0][0]]
+    for n, (index, position) in enumerate(cuts):
+        replacement = markers[position][1]
+        parts.append(lines[index])
+        if not lines[index].endswith("\n"):
+            parts.append("\n")
+        parts.append(replacement)
+        if n + 1 < len(cuts) and replacement and not replacement.endswith("\n"):
+            parts.append("\n")
+    missing = [markers[p][0].pattern for p in range(len(markers)) if p not in found]
+    return ("".join(parts) if cuts else text), missing
+
+
+def new_content(path, replacement, markers):
+    """(current bytes, wanted bytes, missing markers) of one target"""
+    with open(path, "rb") as f:
+        current = f.read()
+    if markers is None:
+        return current, replacement, []
+    text, missing = replace_after_markers(current.decode("utf-8"), markers)
+    return current, text.encode("utf-8"), missing
+
+
+def write_atomic(path, data):
+    """Replace a file's content in one rename, keeping its permissions"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".replace-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def diff_stat(current, wanted, path, full=False):
+    """'+added -removed' summary, or the whole unified diff"""
+    old = current.decode("utf-8", "replace").splitlines(keepends=True)
+    new = wanted.decode("utf-8", "replace").splitlines(keepends=True)
+    diff = list(difflib.unified_diff(old, new, path, path))
+    if full:
+        return "".join(diff)
+    added = sum(1 for line in diff if line.startswith("+") and not line.startswith("+++"))
+    removed = sum(1 for line in diff if line.startswith("-") and not line.startswith("---"))
+    return f"+{added} -{removed}"
+
+
+def process(path, replacement, markers, replace, show_diff):
+    """Update one target; returns (path, status, detail)"""
+    try:
+        current, wanted, missing = new_content(path, replacement, markers)
+        if len(missing) == len(markers or []) and markers:
+            return path, "missing", "marker(s) not found: " + ", ".join(missing)
+        if current == wanted:
+            return path, "unchanged", ""
+        detail = diff_stat(current, wanted, path, show_diff)
+        if missing:
+            detail += " (marker(s) not found: " + ", ".join(missing) + ")"
+        if replace:
+            write_atomic(path, wanted)
+        return path, "changed", detail
+    except (OSError, UnicodeDecodeError) as e:
+        return path, "failed", str(e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replace files, or the text after markers, in many repos")
+    parser.add_argument("pattern", help="glob of the target files ('**' allowed, quote it)")
+    parser.add_argument("replacement", nargs="?", help="file replacing each target (whole-file mode)")
+    parser.add_argument("--marker", nargs=2, action="append", metavar=("REGEX", "FILE"),
+                        help="keep the line matching REGEX and replace what follows it with FILE (repeatable)")
+    parser.add_argument("--replace", action="store_true", help="write the changes (default: dry run)")
+    parser.add_argument("--diff", action="store_true", help="print the unified diff of each change")
+    parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS, help=f"files processed at once (default: {DEFAULT_JOBS})")
+    args = parser.parse_args()
+
+    if bool(args.replacement) == bool(args.marker):
+        parser.error("give either a replacement file or --marker pairs")
+
+    try:
+        if args.marker:
+            replacement = None
+            markers = []
+            for pattern, path in args.marker:
+                with open(path, encoding="utf-8") as f:
+                    markers.append((re.compile(pattern), f.read()))
+        else:
+            markers = None
+            with open(args.replacement, "rb") as f:
+                replacement = f.read()
+    except OSError as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+
+    source = os.path.abspath(args.replacement) if args.replacement else None
+    files = sorted(f for f in glob.glob(args.pattern, recursive=True)
+                   if os.path.isfile(f) and os.path.abspath(f) != source)
+    if not files:
+        print(f"No files matched pattern '{args.pattern}'")
+        sys.exit(0)
+    print(f"Matched {len(files)} file(s) for pattern '{args.pattern}'")
+
+    report = {"changed": 0, "unchanged": 0, "missing": 0, "failed": 0}
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        results = pool.map(lambda f: process(f, replacement, markers, args.replace, args.diff), files)
+        for path, status, detail in results:
+            report[status] += 1
+            if status == "changed":
+                if args.diff:
+                    print(detail, end="" if detail.endswith("\n") else "\n")
+                else:
+                    print(f"{'Replaced' if args.replace else '[Dry Run] Would replace'}: {path} ({detail})")
+            elif status != "unchanged":
+                print(f"{'⚠️ ' if status == 'missing' else '❌'} {path}: {detail}")
+
+    print(f"{report['changed']} changed, {report['unchanged']} already up to date, "
+          f"{report['missing']} without marker, {report['failed']} failed")
+    if args.replace:
+        print("✅ Replacement complete.")
+    else:
+        print("✅ Dry run complete. No files were modified.")
+    if report["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
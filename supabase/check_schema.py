@@ -3,8 +3,8 @@
 Script to check the exact table schema and data types
 """
 import os
-import json
-import requests
+from sb_client import SupabaseClient
+from sb_schema import fetch_schema
 
 
 def get_table_schema():
@@ -18,63 +18,43 @@ def get_table_schema():
         print("❌ Missing SUPABASE_URL or SUPABASE_KEY environment variables")
         return
     
+    client = SupabaseClient(supabase_url, supabase_key, supabase_table)
+
     print(f"📋 Table Schema for: {supabase_table}")
     print("=" * 50)
     
-    # Try to get schema information using OpenAPI endpoint
+    # Schema information from the OpenAPI endpoint, cached and revalidated by ETag
     try:
-        response = requests.get(
-            f"{supabase_url}/rest/v1/",
-            headers={
-                "apikey": supabase_key,
-                "Authorization": f"Bearer {supabase_key}",
-                "Accept": "application/openapi+json"
-            },
-            timeout=10
-        )
-        
-        if response.status_code == 200:
-            schema = response.json()
-            
-            # Look for our table in the schema
-            if 'definitions' in schema:
-                table_def = schema['definitions'].get(supabase_table)
-                if table_def and 'properties' in table_def:
-                    print("📊 Column definitions:")
-                    for column, definition in table_def['properties'].items():
-                        col_type = definition.get('type', 'unknown')
-                        col_format = definition.get('format', '')
-                        required = column in table_def.get('required', [])
-                        
-                        type_info = col_type
-                        if col_format:
-                            type_info += f" ({col_format})"
-                        
-                        required_marker = " ⚠️ REQUIRED" if required else ""
-                        print(f"   • {column}: {type_info}{required_marker}")
-                else:
-                    print(f"❌ Table '{supabase_table}' not found in schema")
+        schema = fetch_schema(client, max_age=0)
+
+        # Look for our table in the schema
+        if 'definitions' in schema:
+            table_def = schema['definitions'].get(supabase_table)
+            if table_def and 'properties' in table_def:
+                print("📊 Column definitions:")
+                for column, definition in table_def['properties'].items():
+                    col_type = definition.get('type', 'unknown')
+                    col_format = definition.get('format', '')
+                    required = column in table_def.get('required', [])
+
+                    type_info = col_type
+                    if col_format:
+                        type_info += f" ({col_format})"
+
+                    required_marker = " ⚠️ REQUIRED" if required else ""
+                    print(f"   • {column}: {type_info}{required_marker}")
             else:
-                print("❌ No schema definitions found")
-                
+                print(f"❌ Table '{supabase_table}' not found in schema")
         else:
-            print(f"❌ Failed to get schema: {response.status_code}")
-            print(f"Response: {response.text}")
-            
+            print("❌ No schema definitions found")
+
     except Exception as e:
         print(f"❌ Error getting schema: {e}")
     
     # Alternative: try to get column info by examining an existing record
     print(f"\n🔍 Attempting to infer schema from existing data...")
     try:
-        response = requests.get(
-            f"{supabase_url}/rest/v1/{supabase_table}?select=*&limit=1",
-            headers={
-                "apikey": supabase_key,
-                "Authorization": f"Bearer {supabase_key}"
-            },
-            timeout=10
-        )
+        response = client.select()
         
         if response.status_code == 200:
             data = response.json()
@@ -3,8 +3,7 @@
 Script to check Supabase table configuration and RLS policies
 """
 import os
-import json
-import requests
+from sb_client import SupabaseClient
 
 
 def check_table_config():
@@ -18,6 +17,8 @@ def check_table_config():
         print("❌ Missing SUPABASE_URL or SUPABASE_KEY environment variables")
         return
     
+    client = SupabaseClient(supabase_url, supabase_key, supabase_table)
+
     print(f"🔍 Checking configuration for table: {supabase_table}")
     print("=" * 50)
     
@@ -25,28 +26,16 @@ def check_table_config():
     print("\n📋 Table Schema:")
     try:
         # This endpoint gives us table information
-        response = requests.get(
-            f"{supabase_url}/rest/v1/{supabase_table}",
-            headers={
-                "apikey": supabase_key,
-                "Authorization": f"Bearer {supabase_key}",
-                "Range": "0-0"  # Just get headers, no data
-            },
-            timeout=10
+        response = client.get(
+            supabase_table,
+            headers={"Range": "0-0"}  # Just get headers, no data
         )
         
         if response.status_code == 200:
             print("   ✅ Table exists and is accessible")
             
             # Try to get one record to see the structure
-            response_data = requests.get(
-                f"{supabase_url}/rest/v1/{supabase_table}?select=*&limit=1",
-                headers={
-                    "apikey": supabase_key,
-                    "Authorization": f"Bearer {supabase_key}"
-                },
-                timeout=10
-            )
+            response_data = client.select()
             
             if response_data.status_code == 200:
                 data = response_data.json()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Run the Supabase diagnostic probes concurrently and report them as JSON
+
+Usage:
+    python diagnose.py                              # env config, SUPABASE_TABLE
+    python diagnose.py --table marks --table marks_test --write
+    python diagnose.py --config setups.json --json report.json
+
+The probes of test_supabase_permissions.py, check_schema.py and
+check_table_config.py (root endpoint, OpenAPI schema, table read, Range probe
+and optional test insert) are independent, so they run at the same time over
+one pooled connection. `--config` takes a JSON list of {"url", "key", "tables"}
+objects to check several projects or keys in one run.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from sb_client import SupabaseClient
+from test_supabase_permissions import decode_jwt_payload
+from update_sb import CONFLICT_COLUMNS
+
+
+HINTS = {
+    401: "Authentication failed - check your SUPABASE_KEY",
+    403: "Insufficient permissions - RLS policy might be blocking access",
+    404: "Table not found - check SUPABASE_TABLE name",
+    422: "Data validation error - check table schema",
+}
+
+
+def timed(name, func):
+    """Run a probe, returning its result with status and latency"""
+    start = time.perf_counter()
+    try:
+        ok, status, detail = func()
+    except Exception as e:
+        ok, status, detail = False, None, str(e)
+    result = {
+        "probe": name,
+        "ok": ok,
+        "status": status,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        "detail": detail,
+    }
+    if not ok and status in HINTS:
+        result["hint"] = HINTS[status]
+    return result
+
+
+def probe_root(client):
+    response = client.get()
+    return response.status_code == 200, response.status_code, None
+
+
+def probe_openapi(client):
+    response = client.get(headers={"Accept": "application/openapi+json"})
+    if response.status_code != 200:
+        return False, response.status_code, response.text[:200]
+    return True, 200, response.json().get("definitions", {})
+
+
+def probe_read(client, table):
+    response = client.select(table)
+    if response.status_code != 200:
+        return False, response.status_code, response.text[:200]
+    return True, 200, f"{len(response.json())} record(s)"
+
+
+def probe_range(client, table):
+    response = client.get(table, headers={"Range": "0-0", "Prefer": "count=exact"})
+    ok = response.status_code in (200, 206)
+    return ok, response.status_code, response.headers.get("Content-Range")
+
+
+def probe_write(client, table):
+    test_data = {
+        'actor': 'test_user',
+        'pytest_score': 99.9,
+        'pytest_string': 'TEST_RUN',
+        'pylint_score': 10.0,
+        'sha': 'test_sha_' + datetime.now().strftime('%Y%m%d_%H%M%S'),
+        'run_number': 999,
+        'repo': 'test/repo',
+    }
+    # Upserted as update_sb.py does: a probe repeated within the second is no 409
+    response = client.upsert(test_data, CONFLICT_COLUMNS, table=table)
+    ok = response.status_code in (200, 201)
+    return ok, response.status_code, None if ok else response.text[:200]
+
+
+def schema_result(openapi, table):
+    """Per-table schema check derived from the shared OpenAPI probe"""
+    result = dict(openapi, probe="schema")
+    if not openapi["ok"]:
+        return result
+    definition = openapi["detail"].get(table)
+    if not definition:
+        return dict(result, ok=False, status=404, detail=f"table '{table}' not in schema", hint=HINTS[404])
+    columns = {
+        column: spec.get("format") or spec.get("type", "unknown")
+        for column, spec in definition.get("properties", {}).items()
+    }
+    return dict(result, detail=columns)
+
+
+def diagnose(url, key, tables, write=False):
+    """Run every probe of one configuration concurrently, returning its report"""
+    probes_per_table = [("read", probe_read), ("range", probe_range)]
+    if write:
+        probes_per_table.append(("write", probe_write))
+    workers = 2 + len(tables) * len(probes_per_table)
+
+    with SupabaseClient(url, key, tables[0], pool_size=workers) as client, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        root = pool.submit(timed, "root", lambda: probe_root(client))
+        openapi = pool.submit(timed, "openapi", lambda: probe_openapi(client))
+        per_table = {
+            table: [pool.submit(timed, name, lambda f=func, t=table: f(client, t)) for name, func in probes_per_table]
+            for table in tables
+        }
+        root, openapi = root.result(), openapi.result()
+        results = {table: [f.result() for f in futures] for table, futures in per_table.items()}
+
+    payload = decode_jwt_payload(key) or {}
+    report = {
+        "url": url,
+        "key_role": payload.get("role", "unknown"),
+        "probes": [root, dict(openapi, detail=None if openapi["ok"] else openapi["detail"])],
+        "tables": {table: [schema_result(openapi, table)] + results[table] for table in tables},
+    }
+    report["ok"] = all(p["ok"] for p in report["probes"]) and all(
+        p["ok"] for probes in report["tables"].values() for p in probes
+    )
+    return report
+
+
+def mark(ok):
+    return "✅" if ok else "❌"
+
+
+def print_summary(report):
+    print(f"🔗 {report['url']} (key role: {report['key_role']})")
+    for p in report["probes"]:
+        print(f"   {mark(p['ok'])} {p['probe']:<8} {p['status']} {p['latency_ms']:>7.1f} ms")
+    for table, probes in report["tables"].items():
+        print(f"   📋 {table}")
+        for p in probes:
+            line = f"      {mark(p['ok'])} {p['probe']:<8} {p['status']} {p['latency_ms']:>7.1f} ms"
+            if not p["ok"]:
+                line += f"  💡 {p.get('hint') or p['detail']}"
+            print(line)
+
+
+def load_configs(args):
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            return [(c["url"], c["key"], c.get("tables") or [c.get("table", "marks")]) for c in json.load(f)]
+
+    url = os.environ.get('SUPABASE_URL')
+    key = os.environ.get('SUPABASE_KEY')
+    if not url or not key:
+        print("❌ Missing SUPABASE_URL or SUPABASE_KEY environment variables")
+        sys.exit(1)
+    return [(url, key, args.table or [os.environ.get('SUPABASE_TABLE') or 'marks'])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent Supabase diagnostics")
+    parser.add_argument("--table", action="append", help="table to check (repeatable, default: SUPABASE_TABLE)")
+    parser.add_argument("--config", help="JSON list of {url, key, tables} configurations")
+    parser.add_argument("--write", action="store_true", help="also insert a test record in each table")
+    parser.add_argument("--json", help="write the JSON report to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    configs = load_configs(args)
+    with ThreadPoolExecutor(max_workers=len(configs)) as pool:
+        reports = list(pool.map(lambda c: diagnose(*c, write=args.write), configs))
+
+    if args.json == "-":
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports:
+            print_summary(report)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(reports, f, indent=2)
+
+    sys.exit(0 if all(r["ok"] for r in reports) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Export the marks table page by page into columnar arrays, and aggregate it
+
+Usage:
+    python export_marks.py export marks.parquet     # or .csv / .npz
+    python export_marks.py stats --score pytest_score --by repo --bins 10
+    python export_marks.py first first.csv          # first scored submission per repo
+
+Rows are fetched with keyset pagination (`id=gt.<last id>&order=id.asc` and a
+Range header), so every page is an index range scan and no request has to
+return the whole table. Paging stops on an empty page, not a short one: the
+server caps pages at its own max rows whatever Range asks for. Pages are appended to one numpy array per column;
+the aggregates (per-group distributions, first/latest submission per actor,
+histograms) are vectorized over those arrays. `to_dataframe()` turns the
+columns into a pandas DataFrame when pandas is installed.
+"""
+import sys
+import csv
+import argparse
+import numpy as np
+from sb_client import SupabaseClient
+from sb_schema import SchemaError, load_definition
+
+
+DEFAULT_PAGE_SIZE = 1000  # Supabase caps responses at 1000 rows by default
+COLUMNS = ["id", "created_at", "actor", "repo", "sha", "run_number",
+           "pytest_score", "pylint_score", "perf_score", "pytest_string"]
+SCORES = ["pytest_score", "pylint_score", "perf_score"]
+INTEGERS = ["id", "run_number"]
+FIRST_VIEW = "first_marks"  # DISTINCT ON (repo) view, see the SQL migration in the README
+
+
+def available_columns(client, columns, table=None):
+    """The columns the table has, per the cached schema; all of them if it is unavailable
+
+    Selecting a column the table lacks (a migration not run yet) is a 400;
+    the rows then simply have no value for it, as for NULL.
+    """
+    try:
+        definition = load_definition(client, table)
+    except SchemaError:
+        return list(columns)
+    if definition is None:
+        return list(columns)
+    properties = definition.get("properties", {})
+    missing = [column for column in columns if column not in properties]
+    if missing:
+        print(f"⚠️ {table or client.table} has no {', '.join(missing)} column(s), read as NULL", file=sys.stderr)
+    return [column for column in columns if column in properties]
+
+
+def fetch_pages(client, columns=COLUMNS, page_size=DEFAULT_PAGE_SIZE, after_id=0, table=None):
+    """Yield the rows with id > after_id, one page at a time in id order"""
+    if "id" not in columns:
+        columns = ["id"] + list(columns)
+    columns = available_columns(client, columns, table)
+    last_id = after_id
+    while True:
+        response = client.get(
+            table or client.table,
+            params={"select": ",".join(columns), "id": f"gt.{last_id}", "order": "id.asc"},
+            headers={"Range-Unit": "items", "Range": f"0-{page_size - 1}"},
+        )
+        response.raise_for_status()
+        rows = response.json()
+        # Only an empty page ends the table: the server may cut a page below
+        # page_size (Supabase's max rows), which says nothing about what is left
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1]["id"]
+
+
+def to_columns(pages, columns=COLUMNS):
+    """One numpy array per column from pages of rows
+
+    Scores are float arrays with NaN for NULL, ids int64, text object arrays.
+    """
+    values = {column: [] for column in columns}
+    for page in pages:
+        for column in columns:
+            values[column].extend(row.get(column) for row in page)
+
+    arrays = {}
+    for column, items in values.items():
+        if column in SCORES:
+            arrays[column] = np.array([np.nan if v is None else v for v in items], dtype=float)
+        elif column in INTEGERS and None not in items:
+            arrays[column] = np.array(items, dtype=np.int64)
+        elif column in INTEGERS:
+            arrays[column] = np.array([np.nan if v is None else v for v in items], dtype=float)
+        else:
+            arrays[column] = np.array(items, dtype=object)
+    return arrays
+
+
+def fetch_columns(client=None, columns=COLUMNS, page_size=DEFAULT_PAGE_SIZE, table=None):
+    """Whole table as one numpy array per column"""
+    client = client or SupabaseClient()
+    return to_columns(fetch_pages(client, columns, page_size, table=table), columns)
+
+
+def first_submission(client, repo, columns=COLUMNS, table=None):
+    """Earliest scored row of one repo, or None
+
+    One indexed lookup: the (repo, created_at) index of the README migration
+    serves the filter and the ordering, so the table is never scanned.
+    """
+    response = client.get(
+        table or client.table,
+        params={
+            "select": ",".join(columns),
+            "repo": f"eq.{repo}",
+            "pytest_score": "not.is.null",
+            "order": "created_at.asc,id.asc",
+            "limit": "1",
+        },
+    )
+    response.raise_for_status()
+    rows = response.json()
+    return rows[0] if rows else None
+
+
+def first_submissions(client=None, columns=COLUMNS, page_size=DEFAULT_PAGE_SIZE, view=FIRST_VIEW):
+    """First scored row of every repo as columns, read from the first_marks view"""
+    return fetch_columns(client, columns, page_size, table=view)
+
+
+def to_dataframe(columns):
+    """pandas DataFrame of the columns (pandas is only needed here)"""
+    import pandas as pd
+    return pd.DataFrame(columns)
+
+
+def group_index(keys):
+    """Sorted unique keys and the group number of every row"""
+    return np.unique(keys.astype(str), return_inverse=True)
+
+
+def distributions(columns, score="pytest_score", by="repo"):
+    """count, mean, std, min, quartiles and max of a score per group
+
+    Returns a dict of arrays, one entry per group, NULL scores left out.
+    """
+    values = columns[score]
+    keep = ~np.isnan(values)
+    groups, inverse = group_index(columns[by][keep])
+    values = values[keep]
+
+    # Sort by group, then by value: each group is a contiguous sorted run
+    order = np.lexsort((values, inverse))
+    values, inverse = values[order], inverse[order]
+    counts = np.bincount(inverse, minlength=len(groups))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    sums = np.bincount(inverse, weights=values, minlength=len(groups))
+    means = sums / counts
+    squares = np.bincount(inverse, weights=(values - means[inverse]) ** 2, minlength=len(groups))
+
+    def quantile(q):
+        # Linear interpolation inside each group, as np.quantile does
+        position = starts + (counts - 1) * q
+        low = np.floor(position).astype(int)
+        high = np.minimum(low + 1, starts + counts - 1)
+        return values[low] + (values[high] - values[low]) * (position - low)
+
+    return {
+        by: groups,
+        "count": counts,
+        "mean": means,
+        "std": np.sqrt(squares / counts),
+        "min": values[starts] if len(values) else values,
+        "p25": quantile(0.25),
+        "median": quantile(0.5),
+        "p75": quantile(0.75),
+        "max": values[starts + counts - 1] if len(values) else values,
+    }
+
+
+def submissions(columns, by="actor", which="first"):
+    """Columns restricted to the first (or latest) row of each group
+
+    Rows are ordered by id, i.e. by insertion time.
+    """
+    groups, inverse = group_index(columns[by])
+    order = np.lexsort((columns["id"], inverse))
+    counts = np.bincount(inverse, minlength=len(groups))
+    ends = np.cumsum(counts)
+    picked = order[ends - counts] if which == "first" else order[ends - 1]
+    return {column: array[picked] for column, array in columns.items()}
+
+
+def histogram(columns, score="pytest_score", bins=10, value_range=None):
+    """(counts, bin edges) of a score over all rows, NULL scores left out"""
+    values = columns[score]
+    return np.histogram(values[~np.isnan(values)], bins=bins, range=value_range)
+
+
+def write_columns(columns, output):
+    """Write columns as Parquet, .npz or CSV depending on the extension"""
+    if output.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        pq.write_table(pa.table({name: array.tolist() for name, array in columns.items()}), output)
+        return
+    if output.endswith(".npz"):
+        np.savez_compressed(output, **columns)
+        return
+
+    with open(output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        # NULL scores are NaN in the arrays but empty cells in the CSV
+        cells = [[None if v != v else v for v in array.tolist()] for array in columns.values()]
+        writer.writerows(zip(*cells))
+
+
+def print_stats(columns, score, by, bins):
+    table = distributions(columns, score, by)
+    print(f"📊 {score} per {by} ({len(table[by])} groups)")
+    print(f"   {by:<40} {'n':>5} {'mean':>6} {'std':>6} {'min':>6} {'median':>6} {'max':>6}")
+    for i, group in enumerate(table[by]):
+        print(f"   {group:<40} {table['count'][i]:>5} {table['mean'][i]:>6.2f} {table['std'][i]:>6.2f} "
+              f"{table['min'][i]:>6.2f} {table['median'][i]:>6.2f} {table['max'][i]:>6.2f}")
+
+    counts, edges = histogram(columns, score, bins)
+    print(f"\n📈 {score} histogram")
+    width = max(counts.max(), 1) if len(counts) else 1
+    for count, low, high in zip(counts, edges[:-1], edges[1:]):
+        print(f"   [{low:6.2f}, {high:6.2f}) {count:>6} {'█' * int(40 * count / width)}")
+
+    first = submissions(columns, "actor", "first")
+    latest = submissions(columns, "actor", "latest")
+    print(f"\n👤 {len(first['actor'])} actors: mean {score} "
+          f"first {np.nanmean(first[score]):.2f}, latest {np.nanmean(latest[score]):.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and aggregate the marks table")
+    parser.add_argument("command", choices=["export", "stats", "first"])
+    parser.add_argument("output", nargs="?", help="export/first: output .parquet, .npz or .csv file")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="rows per request")
+    parser.add_argument("--score", choices=SCORES, default="pytest_score")
+    parser.add_argument("--by", default="repo", help="stats: column to group by")
+    parser.add_argument("--bins", type=int, default=10, help="stats: histogram bins")
+    args = parser.parse_args()
+
+    if args.command in ("export", "first") and not args.output:
+        parser.error(f"{args.command} needs an output file")
+
+    with SupabaseClient() as client:
+        if args.command == "first":
+            columns = first_submissions(client, page_size=args.page_size)
+        else:
+            columns = fetch_columns(client, page_size=args.page_size)
+    rows = len(columns["id"])
+
+    if args.command in ("export", "first"):
+        write_columns(columns, args.output)
+        print(f"✅ {rows} rows exported → {args.output}")
+    elif rows:
+        print_stats(columns, args.score, args.by, args.bins)
+    else:
+        print("Table is empty")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Supabase PostgREST endpoint
+
+Usage:
+    python fake_postgrest.py [--port 54321] [--key devkey] [--latency 0.05]
+                             [--fail-rate 0.1] [--throttle-rate 0.05]
+
+Then point any script at it:
+    export SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_KEY=devkey
+
+Implements the subset the supabase/ scripts use, in memory:
+- GET /rest/v1/ (OpenAPI document, with ETag and If-None-Match)
+- GET /rest/v1/<table> with select, limit, offset, order, eq/neq/gt/gte/lt/lte/in
+  filters, Range requests and Prefer: count=exact
+- POST /rest/v1/<table> with one record or an array (atomic), Prefer: return=...,
+  and upserts with ?on_conflict= and Prefer: resolution=ignore-duplicates|merge-duplicates
+- 401 (bad key), 403 (read-only key writing), 404 (unknown table),
+  409 (duplicate of the unique key), 422 (row that does not fit the schema),
+  429/503 (injected failures)
+"""
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, parse_qsl
+from http.server import ThreadingHTTPServer
+from sb_schema import SchemaError, coerce_record, coerce_value
+from sb_http import JSONHandler, prefer_options, parse_records
+
+
+MARKS_DEFINITION = {
+    "required": ["id", "created_at"],
+    "properties": {
+        "id": {"type": "integer", "format": "bigint", "description": "Note:\nThis is a Primary Key.<pk/>"},
+        "created_at": {"type": "string", "format": "timestamp with time zone", "default": "now()"},
+        "actor": {"type": "string", "format": "text"},
+        "pylint_score": {"type": "number", "format": "real"},
+        "pytest_score": {"type": "number", "format": "real"},
+        "pytest_string": {"type": "string", "format": "text"},
+        "sha": {"type": "string", "format": "character varying"},
+        "run_number": {"type": "integer", "format": "smallint"},
+        "repo": {"type": "string", "format": "text"},
+        "perf_score": {"type": "number", "format": "real"},
+        "perf_timings": {"format": "jsonb"},
+        "timings": {"format": "jsonb"},
+        "outcomes": {"format": "jsonb"},
+    },
+}
+MARKS_UNIQUE = ("repo", "sha", "run_number")  # see the SQL migration in the README
+SUITES_DEFINITION = {
+    "required": ["suite", "ids"],
+    "properties": {
+        "suite": {"type": "string", "format": "text", "description": "Note:\nThis is a Primary Key.<pk/>"},
+        "ids": {"format": "jsonb"},
+        "created_at": {"type": "string", "format": "timestamp with time zone", "default": "now()"},
+    },
+}
+SUITES_UNIQUE = ("suite",)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, code=None, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.body = {"code": code, "message": message, "details": None, "hint": None}
+        self.headers = headers or {}
+
+
+class Table:
+    """Rows of one table, with its OpenAPI definition"""
+
+    def __init__(self, definition, unique=()):
+        self.definition = definition
+        self.unique = tuple(unique)
+        self.rows = []
+        self.by_key = {}  # unique key -> row
+        self.next_id = 1
+        self.lock = threading.Lock()
+
+    def key(self, record):
+        return tuple(record.get(column) for column in self.unique)
+
+    def insert(self, records, on_conflict=None, resolution=None):
+        """Insert records atomically, returning the rows inserted or merged
+
+        Rows clashing with the unique key are a 409, unless on_conflict names
+        that key: they are then skipped (ignore-duplicates) or updated.
+        """
+        if on_conflict and (not self.unique or set(on_conflict) != set(self.unique)):
+            raise HTTPError(400, "there is no unique or exclusion constraint matching "
+                                 "the ON CONFLICT specification", "42P10")
+        try:
+            coerced = [coerce_record(record, self.definition) for record in records]
+        except SchemaError as e:
+            raise HTTPError(422, str(e), "22P02") from None
+        with self.lock:
+            if self.unique and not on_conflict:
+                keys = [self.key(record) for record in coerced]
+                if len(set(keys)) < len(keys) or any(key in self.by_key for key in keys):
+                    raise HTTPError(409, "duplicate key value violates unique constraint", "23505")
+
+            rows = []
+            for record in coerced:
+                existing = self.by_key.get(self.key(record)) if self.unique else None
+                if existing is not None:
+                    if resolution == "merge-duplicates":
+                        existing.update(record)
+                        rows.append(existing)
+                    continue
+                row = {column: None for column in self.definition["properties"]}
+                row.update(record)
+                row["id"] = self.next_id
+                row["created_at"] = datetime.now(timezone.utc).isoformat()
+                self.next_id += 1
+                self.rows.append(row)
+                if self.unique:
+                    self.by_key[self.key(row)] = row
+                rows.append(row)
+        return rows
+
+
+def parse_in_list(value):
+    """Items of a PostgREST in.(a,"b,c") list"""
+    items, current, quoted, escaped = [], "", False, False
+    for char in value.strip("()"):
+        if escaped:
+            current += char
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif char == "," and not quoted:
+            items.append(current)
+            current = ""
+        else:
+            current += char
+    items.append(current)
+    return items
+
+
+OPERATORS = {
+    "is": lambda a, b: a is b,
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt": lambda a, b: a is not None and a > b,
+    "gte": lambda a, b: a is not None and a >= b,
+    "lt": lambda a, b: a is not None and a < b,
+    "lte": lambda a, b: a is not None and a <= b,
+    "in": lambda a, b: a in b,
+}
+
+
+def make_filter(column, expression, spec):
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[len("not."):]
+    operator, _, value = expression.partition(".")
+    if operator not in OPERATORS:
+        raise HTTPError(400, f"unsupported operator '{operator}'", "PGRST100")
+    try:
+        if operator == "is":
+            value = {"null": None, "true": True, "false": False}[value]
+        elif operator == "in":
+            value = [coerce_value(column, item, spec) for item in parse_in_list(value)]
+        else:
+            value = coerce_value(column, value, spec)
+    except (SchemaError, KeyError) as e:
+        raise HTTPError(400, str(e), "22P02") from None
+    test = OPERATORS[operator]
+    return lambda row: test(row.get(column), value) != negate
+
+
+def select_rows(table, params):
+    """Rows matching a PostgREST query, as (rows before limit/offset, rows)"""
+    properties = table.definition["properties"]
+    filters, order, limit, offset, columns = [], None, None, 0, None
+    for name, value in params:
+        if name == "select":
+            columns = None if value == "*" else value.split(",")
+        elif name == "order":
+            order = value
+        elif name == "limit":
+            limit = int(value)
+        elif name == "offset":
+            offset = int(value)
+        elif name == "on_conflict":
+            continue
+        elif name in properties:
+            filters.append(make_filter(name, value, properties[name]))
+        else:
+            raise HTTPError(400, f"column '{name}' does not exist", "42703")
+    for column in columns or []:
+        if column not in properties:
+            raise HTTPError(400, f"column '{column}' does not exist", "42703")
+
+    with table.lock:
+        rows = [row for row in table.rows if all(f(row) for f in filters)]
+    if order:
+        for term in reversed(order.split(",")):
+            column, _, direction = term.partition(".")
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)),
+                      reverse=direction.startswith("desc"))
+    matched = len(rows)
+    rows = rows[offset:] if limit is None else rows[offset:offset + limit]
+    if columns:
+        rows = [{column: row.get(column) for column in columns} for row in rows]
+    return matched, rows
+
+
+class FakePostgrest(ThreadingHTTPServer):
+    """In-memory PostgREST subset with latency and failure injection"""
+
+    daemon_threads = True
+    request_queue_size = 128  # the socketserver default of 5 resets connections under bursts
+
+    def __init__(self, address=("127.0.0.1", 0), key="devkey", read_only_keys=(),
+                 tables=None, latency=0.0, jitter=0.0, fail_rate=0.0, throttle_rate=0.0,
+                 unique=MARKS_UNIQUE, retry_after=1, max_rows=None, verbose=False):
+        super().__init__(address, Handler)
+        self.key = key
+        self.read_only_keys = set(read_only_keys)
+        tables = tables or {"marks": MARKS_DEFINITION, "test_suites": SUITES_DEFINITION}
+        # `unique` is the key of the marks-like tables; test_suites always has its primary key
+        self.tables = {
+            name: Table(definition, SUITES_UNIQUE if definition is SUITES_DEFINITION else unique)
+            for name, definition in tables.items()
+        }
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.max_rows = max_rows  # like PostgREST's db-max-rows: a longer Range is cut short
+        self.verbose = verbose
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def openapi(self):
+        document = {
+            "swagger": "2.0",
+            "info": {"title": "fake PostgREST", "version": "1"},
+            "paths": {f"/{name}": {} for name in self.tables},
+            "definitions": {name: table.definition for name, table in self.tables.items()},
+        }
+        body = json.dumps(document).encode()
+        return body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+    def count(self, status):
+        with self.stats_lock:
+            self.stats[status] = self.stats.get(status, 0) + 1
+
+    def start(self):
+        """Serve from a daemon thread, returning self"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class Handler(JSONHandler):
+
+    def sent(self, status):
+        self.server.count(status)
+
+    def handle_request(self, method):
+        server = self.server
+        if server.latency or server.jitter:
+            time.sleep(server.latency + random.uniform(0, server.jitter))
+        body = self.read_body()
+
+        try:
+            if random.random() < server.throttle_rate:
+                raise HTTPError(429, "too many requests", headers={"Retry-After": str(server.retry_after)})
+            if random.random() < server.fail_rate:
+                raise HTTPError(503, "injected failure")
+
+            key = self.headers.get("apikey")
+            if key != server.key and key not in server.read_only_keys:
+                raise HTTPError(401, "Invalid API key", "PGRST301")
+
+            url = urlsplit(self.path)
+            if not url.path.startswith("/rest/v1/"):
+                raise HTTPError(404, f"no route for {url.path}")
+            name = url.path[len("/rest/v1/"):].strip("/")
+            params = parse_qsl(url.query, keep_blank_values=True)
+
+            if not name:
+                if method != "GET":
+                    raise HTTPError(405, "method not allowed")
+                document, etag = server.openapi()
+                if self.headers.get("If-None-Match") == etag:
+                    return self.send_json(304, headers={"ETag": etag})
+                return self.send_json(200, document, {"ETag": etag})
+
+            table = server.tables.get(name)
+            if table is None:
+                raise HTTPError(404, f"relation 'public.{name}' does not exist", "42P01")
+            if method == "GET":
+                return self.get_rows(table, params)
+            if key != server.key:
+                raise HTTPError(403, f"permission denied for table {name}", "42501")
+            return self.post_rows(table, body, params)
+        except HTTPError as e:
+            self.send_json(e.status, e.body, e.headers)
+
+    def get_rows(self, table, params):
+        prefer = self.headers.get("Prefer", "")
+        range_header = self.headers.get("Range")
+        if range_header:
+            first, _, last = range_header.partition("-")
+            params = [(n, v) for n, v in params if n not in ("limit", "offset")]
+            params.append(("offset", first))
+            if last:
+                params.append(("limit", str(int(last) - int(first) + 1)))
+        if self.server.max_rows:
+            limit = min(int(dict(params).get("limit", self.server.max_rows)), self.server.max_rows)
+            params = [(n, v) for n, v in params if n != "limit"] + [("limit", str(limit))]
+        matched, rows = select_rows(table, params)
+        offset = int(dict(params).get("offset", 0))
+        total = str(matched) if "count=exact" in prefer else "*"
+        span = f"{offset}-{offset + len(rows) - 1}" if rows else "*"
+        status = 206 if range_header and rows and offset + len(rows) < matched else 200
+        self.send_json(status, rows, {"Content-Range": f"{span}/{total}"})
+
+    def post_rows(self, table, body, params):
+        try:
+            records = parse_records(body)
+        except ValueError as e:
+            raise HTTPError(400, str(e), "PGRST102") from None
+        on_conflict = dict(params).get("on_conflict")
+        options = prefer_options(self.headers.get("Prefer"))
+        resolution = options.get("resolution")
+        rows = table.insert(records, on_conflict.split(",") if on_conflict else None, resolution)
+        if options.get("return") == "representation":
+            return self.send_json(201, rows)
+        self.send_json(201)
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Supabase PostgREST endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--key", default="devkey", help="API key with read and write access")
+    parser.add_argument("--read-only-key", action="append", default=[], help="API key that gets 403 on writes")
+    parser.add_argument("--table", action="append", help="table name(s) with the marks schema (default: marks)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency, up to this many seconds")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--no-unique", action="store_true",
+                        help="no unique (repo, sha, run_number) key, as before the migration")
+    parser.add_argument("--max-rows", type=int, help="most rows returned by one GET, as Supabase's 1000")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    server = FakePostgrest(
+        (args.host, args.port), key=args.key, read_only_keys=args.read_only_key,
+        tables={**{name: MARKS_DEFINITION for name in args.table or ["marks"]}, "test_suites": SUITES_DEFINITION},
+        latency=args.latency, jitter=args.jitter, fail_rate=args.fail_rate,
+        throttle_rate=args.throttle_rate, unique=() if args.no_unique else MARKS_UNIQUE,
+        max_rows=args.max_rows, verbose=args.verbose,
+    )
+    print(f"🚀 Fake PostgREST on {server.url} (tables: {', '.join(server.tables)})")
+    print(f"   export SUPABASE_URL={server.url} SUPABASE_KEY={args.key}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nstopped")
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
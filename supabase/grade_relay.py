@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Relay between the student CI runs and Supabase, coalescing inserts into batches
+
+Usage:
+    export SUPABASE_URL=https://your-project.supabase.co SUPABASE_KEY=service_role_key
+    python grade_relay.py [--port 8787] [--key relaykey] [--batch-size 500] [--linger 0.5]
+                          [--max-pending 5000]
+
+Then give the student repos the relay instead of Supabase:
+    SUPABASE_URL=http://relay-host:8787 SUPABASE_KEY=relaykey
+
+The relay key sits in every student repo, so the relay only does what
+`update_sb.py` needs, with the service role key it holds:
+- POST /rest/v1/<grades table>?on_conflict=repo,sha,run_number and
+  POST /rest/v1/test_suites?on_conflict=suite (one record or an array) are
+  validated against the table schema, queued and answered 202 at once; a
+  suite already queued once is acknowledged without being buffered again. The
+  resolution is always ignore-duplicates: a relay key cannot overwrite a
+  grade. 400 if a record does not fit the schema, 403 for any other table or
+  conflict key; 429 with Retry-After when the queue is full, which the client
+  retries after the delay.
+- GET /rest/v1/ serves the schema, revalidated upstream every --get-ttl
+  seconds (the table definitions follow it); no table can be read.
+- GET /relay/stats returns the counters as JSON.
+
+A flusher thread sends each queue (one per table, conflict columns and
+resolution) as an array upsert when it holds --batch-size records or its
+oldest record waited --linger seconds, so a deadline burst of single-row
+POSTs reaches Supabase as a few bulk writes. An upstream 429/503 pauses the
+flusher for its Retry-After (or an exponential backoff); grades that could not
+be written go to the outbox (outbox.py) and are drained after the next
+successful batch. Records still queued are flushed on Ctrl-C; a 202 is only
+an in-memory promise until then.
+"""
+import sys
+import json
+import time
+import math
+import hashlib
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qsl
+from http.server import ThreadingHTTPServer
+from sb_client import SupabaseClient
+from sb_http import JSONHandler, parse_records
+from sb_schema import SchemaError, fetch_schema, table_definition, coerce_record
+from update_sb import CONFLICT_COLUMNS, SUITES_TABLE, insert_chunk, is_retryable, spool, drain
+
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_LINGER = 0.5      # seconds a record may wait for its batch to fill
+DEFAULT_MAX_PENDING = 5000
+MAX_BACKOFF = 30          # seconds, upper bound of the pause after upstream failures
+RESOLUTION = "ignore-duplicates"  # whatever the client asks for
+SUITE_CONFLICT = "suite"  # conflict key of update_sb.register_suite
+
+
+class RelayError(Exception):
+    """Error answered to the client, as PostgREST would"""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.body = {"message": message}
+        self.headers = headers or {}
+
+
+class Coalescer:
+    """Bounded queues of records, flushed upstream as batch upserts by one thread"""
+
+    def __init__(self, client, batch_size=DEFAULT_BATCH_SIZE, linger=DEFAULT_LINGER,
+                 max_pending=DEFAULT_MAX_PENDING):
+        self.client = client
+        self.batch_size = batch_size
+        self.linger = linger
+        self.max_pending = max_pending
+        self.condition = threading.Condition()
+        self.queues = {}  # (table, on_conflict) -> [(arrival, record)]
+        self.pending = 0
+        self.paused_until = 0.0
+        self.backoff = 0.0
+        self.spooled = 0
+        self.stopping = False
+        self.stats = {"accepted": 0, "throttled": 0, "batches": 0, "written": 0,
+                      "rejected": 0, "spooled": 0, "dropped": 0, "last_batch_ms": None}
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def retry_after(self):
+        """Seconds a throttled client should wait: the upstream pause, or one batch"""
+        last_batch = (self.stats["last_batch_ms"] or 0) / 1000
+        return max(1, math.ceil(max(self.paused_until - time.monotonic(), self.linger, last_batch)))
+
+    def offer(self, key, records):
+        """Queue all the records of a request, or none if they do not fit"""
+        with self.condition:
+            if self.stopping or self.pending + len(records) > self.max_pending:
+                self.stats["throttled"] += 1
+                return False
+            now = time.monotonic()
+            queue = self.queues.setdefault(key, [])
+            was_empty = not queue
+            queue.extend((now, record) for record in records)
+            self.pending += len(records)
+            self.stats["accepted"] += len(records)
+            # Wake the flusher to start this queue's linger clock, or to send a full batch
+            if was_empty or len(queue) >= self.batch_size:
+                self.condition.notify()
+            return True
+
+    def next_batch(self):
+        """Wait for a full or lingering queue and take a batch from it; None once stopped and empty"""
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                if self.stopping and not self.pending:
+                    return None
+                if now < self.paused_until and not self.stopping:
+                    self.condition.wait(self.paused_until - now)
+                    continue
+                wait = None
+                for key, queue in self.queues.items():
+                    if not queue:
+                        continue
+                    due = queue[0][0] + self.linger - now
+                    if len(queue) >= self.batch_size or due <= 0 or self.stopping:
+                        batch = [record for _, record in queue[:self.batch_size]]
+                        del queue[:self.batch_size]
+                        self.pending -= len(batch)
+                        return key, batch
+                    wait = due if wait is None else min(wait, due)
+                self.condition.wait(wait)
+
+    def requeue(self, key, records):
+        """Put records back at the head of their queue, past admission control"""
+        with self.condition:
+            now = time.monotonic()
+            self.queues.setdefault(key, [])[:0] = [(now, record) for record in records]
+            self.pending += len(records)
+
+    def pause(self, errors):
+        """Stop flushing for the upstream Retry-After, or a doubling backoff"""
+        delays = []
+        for error in errors:
+            response = getattr(error, "response", None)
+            value = response.headers.get("Retry-After") if response is not None else None
+            if value and value.isdigit():
+                delays.append(int(value))
+        self.backoff = min(max(self.backoff * 2, 1), MAX_BACKOFF)
+        delay = max(delays) if delays else self.backoff
+        with self.condition:
+            self.paused_until = time.monotonic() + delay
+        print(f"⏸️  upstream unavailable, flushing paused for {delay}s")
+
+    def write(self, key, batch):
+        """Send one batch, returning the (record, error) pairs that were not written"""
+        table, on_conflict = key
+        if table == self.client.table:
+            # The grades path: a bad row is isolated by splitting the batch
+            return insert_chunk(self.client, batch)
+        try:
+            response = self.client.upsert(batch, on_conflict, table=table, prefer="return=minimal",
+                                          resolution=RESOLUTION)
+            response.raise_for_status()
+            return []
+        except Exception as e:
+            return [(record, e) for record in batch]
+
+    def flush(self, key, batch):
+        start = time.perf_counter()
+        failed = self.write(key, batch)
+        elapsed = (time.perf_counter() - start) * 1000
+        retryable = [record for record, error in failed if is_retryable(error)]
+        rejected = len(failed) - len(retryable)
+        with self.condition:
+            self.stats["batches"] += 1
+            self.stats["written"] += len(batch) - len(failed)
+            self.stats["rejected"] += rejected
+            self.stats["last_batch_ms"] = round(elapsed, 1)
+        print(f"📦 {key[0]}: {len(batch) - len(failed)}/{len(batch)} written in {elapsed:.0f} ms"
+              + (f", {rejected} rejected" if rejected else "") + (f", {len(retryable)} to retry" if retryable else ""))
+        for record, error in failed:
+            if not is_retryable(error):
+                print(f"   rejected {json.dumps(record)}: {error}")
+
+        if not retryable:
+            self.backoff = 0.0
+            if self.spooled and key[0] == self.client.table:
+                self.spooled = drain(client=self.client)
+            return
+        self.pause([error for _, error in failed])
+        if key[0] == self.client.table:
+            # Grades are kept on disk rather than in memory
+            spool(retryable, failed[0][1])
+            self.spooled += len(retryable)
+            self.stats["spooled"] += len(retryable)
+        elif not self.stopping:
+            self.requeue(key, retryable)
+        else:
+            self.stats["dropped"] += len(retryable)
+            print(f"   {len(retryable)} {key[0]} record(s) dropped on shutdown")
+
+    def run(self):
+        while True:
+            item = self.next_batch()
+            if item is None:
+                return
+            try:
+                self.flush(*item)
+            except Exception as e:
+                print(f"❌ flush failed: {e}")
+
+    def stop(self):
+        """Flush everything still queued, ignoring linger and pauses"""
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        self.thread.join()
+
+    def snapshot(self):
+        with self.condition:
+            return dict(self.stats, pending=self.pending, spooled_waiting=self.spooled,
+                        paused_for=round(max(self.paused_until - time.monotonic(), 0), 1))
+
+
+class GradeRelay(ThreadingHTTPServer):
+    """HTTP front of a Coalescer, writing only grades and test suites"""
+
+    daemon_threads = True
+    request_queue_size = 1024  # deadline bursts: queue connections rather than reset them
+
+    def __init__(self, address, client, keys, get_ttl=5.0, verbose=False, **coalescer_options):
+        super().__init__(address, Handler)
+        self.client = client
+        self.keys = set(keys)
+        self.get_ttl = get_ttl
+        self.verbose = verbose
+        self.coalescer = Coalescer(client, **coalescer_options)
+        # The only writes a relay key allows: table -> conflict columns
+        self.routes = {client.table: CONFLICT_COLUMNS, SUITES_TABLE: SUITE_CONFLICT}
+        self.known_suites = set()  # digests already queued: their ids are not buffered again
+        self.definitions = {}  # table -> definition, from the schema with definitions_etag
+        self.definitions_etag = None
+        self.schema_cache = None  # (expires, document, body, etag)
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def schema(self):
+        """Upstream OpenAPI document, revalidated every get_ttl seconds, its JSON and its ETag"""
+        cached = self.schema_cache
+        if cached is None or cached[0] < time.monotonic():
+            document = fetch_schema(self.client, max_age=self.get_ttl)
+            body = json.dumps(document).encode()
+            cached = (time.monotonic() + self.get_ttl, document, body,
+                      '"' + hashlib.sha256(body).hexdigest()[:32] + '"')
+            self.schema_cache = cached
+        return cached[1:]
+
+    def definition(self, table):
+        """Schema of a table, None when the schema cannot be read
+
+        The definitions are kept as long as the schema's ETag: a migration
+        reaches the validation within get_ttl seconds.
+        """
+        with self.lock:
+            try:
+                document, _, etag = self.schema()
+            except Exception as e:
+                print(f"Schema unavailable, payloads not validated: {e}")
+                return None
+            if etag != self.definitions_etag:
+                self.definitions, self.definitions_etag = {}, etag
+            if table not in self.definitions:
+                self.definitions[table] = table_definition(document, table)
+            return self.definitions[table]
+
+    def start(self):
+        """Serve and flush from daemon threads, returning self"""
+        self.coalescer.start()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.coalescer.stop()
+
+
+class Handler(JSONHandler):
+
+    def handle_request(self, method):
+        server = self.server
+        body = self.read_body()
+
+        try:
+            if self.headers.get("apikey") not in server.keys:
+                raise RelayError(401, "Invalid API key")
+
+            url = urlsplit(self.path)
+            if url.path == "/relay/stats" and method == "GET":
+                return self.send_json(200, server.coalescer.snapshot())
+            if not url.path.startswith("/rest/v1/"):
+                raise RelayError(404, f"no route for {url.path}")
+            name = url.path[len("/rest/v1/"):].strip("/")
+
+            if method == "GET" and not name:
+                _, document, etag = server.schema()
+                if self.headers.get("If-None-Match") == etag:
+                    return self.send_json(304, headers={"ETag": etag})
+                return self.send_json(200, document, {"ETag": etag})
+            if method == "GET":
+                raise RelayError(403, "the relay serves no table, only the schema")
+            if not name:
+                raise RelayError(405, "method not allowed")
+            return self.post_rows(name, body, dict(parse_qsl(url.query, keep_blank_values=True)))
+        except RelayError as e:
+            self.send_json(e.status, e.body, e.headers)
+        except Exception as e:
+            self.send_json(502, {"message": f"upstream error: {e}"})
+
+    def post_rows(self, table, body, params):
+        on_conflict = params.get("on_conflict")
+        if table not in self.server.routes or on_conflict != self.server.routes[table]:
+            raise RelayError(403, f"the relay only upserts into {', '.join(self.server.routes)} "
+                                  "on their unique key")
+        try:
+            records = parse_records(body)
+        except ValueError as e:
+            raise RelayError(400, str(e)) from None
+
+        # Rejected now, while the client can still report it, rather than at flush time
+        try:
+            definition = self.server.definition(table)
+            if definition is not None:
+                records = [coerce_record(record, definition) for record in records]
+        except SchemaError as e:
+            raise RelayError(400, str(e)) from None
+
+        server = self.server
+        if table == SUITES_TABLE:
+            # The same suite comes with every run of a cohort: keep only the first
+            with server.lock:
+                records = [record for record in records if record.get(SUITE_CONFLICT) not in server.known_suites]
+            if not records:
+                return self.send_json(202)
+        # Written with RESOLUTION whatever the Prefer header says
+        key = (table, on_conflict)
+        coalescer = server.coalescer
+        if not coalescer.offer(key, records):
+            raise RelayError(429, "relay queue full", {"Retry-After": str(coalescer.retry_after())})
+        if table == SUITES_TABLE:
+            with server.lock:
+                server.known_suites.update(record.get(SUITE_CONFLICT) for record in records)
+        self.send_json(202)
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coalesce grade inserts into batched Supabase writes")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--key", action="append", required=True, help="API key the CI runs send (repeatable)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="records per upstream write")
+    parser.add_argument("--linger", type=float, default=DEFAULT_LINGER, help="seconds a record waits for its batch")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help="queued records before answering 429")
+    parser.add_argument("--get-ttl", type=float, default=5.0,
+                        help="seconds the schema and table definitions are reused before revalidation")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    client = SupabaseClient()
+    server = GradeRelay(
+        (args.host, args.port), client, args.key, get_ttl=args.get_ttl, verbose=args.verbose,
+        batch_size=args.batch_size, linger=args.linger, max_pending=args.max_pending,
+    )
+    print(f"🚀 Grade relay on {server.url} → {client.url} (table {client.table})")
+    print(f"   batches of {args.batch_size} or every {args.linger}s, at most {args.max_pending} queued")
+    server.coalescer.start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nstopping, flushing the queued records")
+        server.server_close()
+        server.coalescer.stop()
+        print(json.dumps(server.coalescer.snapshot()))
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
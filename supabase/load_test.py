@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Deadline-burst load test of the grade ingestion path
+
+Usage:
+    python load_test.py                             # all modes, 200 clients
+    python load_test.py --mode single --clients 500 --ramp 10 --fail-rate 0.05
+    python load_test.py --url http://127.0.0.1:54321 --key devkey --json report.json
+
+N simulated CI runs post the record update_sb.main() builds, all starting
+within `--ramp` seconds. Unless `--url` is given, a fake_postgrest.py server is
+started in-process for each mode (with the given latency and failure rates).
+
+Modes:
+- single:  one new client (session, connection) per run, as each CI job does today
+- pooled:  runs share one keep-alive client, one POST per record
+- batched: runs hand their record to writer threads posting array upserts
+
+Reported per mode: throughput, p50/p95/p99 latency per record, errors, urllib3
+retries and lost records (posted records missing from the table afterwards).
+"""
+import sys
+import json
+import time
+import uuid
+import queue
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sb_client import SupabaseClient
+from fake_postgrest import FakePostgrest, MARKS_DEFINITION
+from update_sb import CONFLICT_COLUMNS
+
+
+MODES = ("single", "pooled", "batched")
+
+
+def make_record(tag, index):
+    """Record shaped like the one update_sb.main() inserts"""
+    return {
+        'actor': f"student{index:04d}",
+        'pytest_score': round(random.random(), 2),
+        'pytest_string': "".join(random.choice(".FE") for _ in range(20)),
+        'pylint_score': round(random.uniform(0, 10), 2),
+        'sha': uuid.uuid4().hex + uuid.uuid4().hex[:8],
+        'run_number': random.randint(1, 500),
+        'repo': tag,
+    }
+
+
+def retries_of(response):
+    """Number of urllib3 retries behind a response"""
+    retries = getattr(response.raw, "retries", None)
+    return len(retries.history) if retries is not None else 0
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+class Stats:
+    """Thread-safe per-record latencies and error/retry counters"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.errors = {}
+        self.retries = 0
+        self.sent = 0
+
+    def record(self, latencies, response=None, error=None):
+        """Outcome of one POST carrying len(latencies) records"""
+        with self.lock:
+            self.sent += len(latencies)
+            if response is not None:
+                self.retries += retries_of(response)
+            if error is None and response.ok:
+                self.latencies.extend(latencies)
+            else:
+                reason = type(error).__name__ if error is not None else str(response.status_code)
+                self.errors[reason] = self.errors.get(reason, 0) + len(latencies)
+
+
+def run_single(url, key, records, stats, delays, args):
+    def post(record, delay):
+        time.sleep(delay)
+        start = time.perf_counter()
+        try:
+            with SupabaseClient(url, key, args.table) as client:
+                response = client.upsert(record, CONFLICT_COLUMNS, prefer="return=minimal")
+            stats.record([time.perf_counter() - start], response)
+        except Exception as e:
+            stats.record([time.perf_counter() - start], error=e)
+
+    with ThreadPoolExecutor(max_workers=len(records)) as pool:
+        list(pool.map(post, records, delays))
+
+
+def run_pooled(url, key, records, stats, delays, args):
+    with SupabaseClient(url, key, args.table, pool_size=args.pool_size) as client:
+        def post(record, delay):
+            time.sleep(delay)
+            start = time.perf_counter()
+            try:
+                response = client.upsert(record, CONFLICT_COLUMNS, prefer="return=minimal")
+                stats.record([time.perf_counter() - start], response)
+            except Exception as e:
+                stats.record([time.perf_counter() - start], error=e)
+
+        with ThreadPoolExecutor(max_workers=len(records)) as pool:
+            list(pool.map(post, records, delays))
+
+
+def run_batched(url, key, records, stats, delays, args):
+    pending = queue.Queue()
+    done = object()
+
+    with SupabaseClient(url, key, args.table, pool_size=args.writers) as client:
+        def writer():
+            while True:
+                item = pending.get()
+                if item is done:
+                    pending.put(done)  # leave it for the other writers
+                    return
+                batch = [item]
+                deadline = time.perf_counter() + args.linger
+                while len(batch) < args.batch_size:
+                    try:
+                        item = pending.get(timeout=max(0, deadline - time.perf_counter()))
+                    except queue.Empty:
+                        break
+                    if item is done:
+                        pending.put(done)
+                        break
+                    batch.append(item)
+
+                payload = [record for record, _ in batch]
+                try:
+                    response = client.upsert(payload, CONFLICT_COLUMNS, prefer="return=minimal")
+                    error = None
+                except Exception as e:
+                    response, error = None, e
+                # Latency of each record counts from when its run handed it over
+                now = time.perf_counter()
+                stats.record([now - enqueued for _, enqueued in batch], response, error)
+
+        def submit(record, delay):
+            time.sleep(delay)
+            pending.put((record, time.perf_counter()))
+
+        writers = [threading.Thread(target=writer) for _ in range(args.writers)]
+        for thread in writers:
+            thread.start()
+        with ThreadPoolExecutor(max_workers=len(records)) as pool:
+            list(pool.map(submit, records, delays))
+        pending.put(done)
+        for thread in writers:
+            thread.join()
+
+
+RUNNERS = {"single": run_single, "pooled": run_pooled, "batched": run_batched}
+
+
+def stored_count(url, key, table, tag):
+    """Rows of this load test in the table, counted server-side"""
+    with SupabaseClient(url, key, table) as client:
+        response = client.get(
+            f"{table}?select=id&repo=eq.{tag}",
+            headers={"Range": "0-0", "Prefer": "count=exact"},
+        )
+        response.raise_for_status()
+    return int(response.headers["Content-Range"].rsplit("/", 1)[1])
+
+
+def run_mode(mode, args):
+    """Run one load test mode, returning its report"""
+    server = None
+    url, key = args.url, args.key
+    if url is None:
+        server = FakePostgrest(
+            key=key, tables={args.table: MARKS_DEFINITION},
+            latency=args.latency, jitter=args.jitter, fail_rate=args.fail_rate,
+            throttle_rate=args.throttle_rate, retry_after=args.retry_after,
+        ).start()
+        url = server.url
+
+    tag = f"loadtest/{mode}-{uuid.uuid4().hex[:8]}"
+    records = [make_record(tag, i) for i in range(args.clients)]
+    delays = [random.uniform(0, args.ramp) for _ in records]
+    stats = Stats()
+
+    start = time.perf_counter()
+    RUNNERS[mode](url, key, records, stats, delays, args)
+    elapsed = time.perf_counter() - start
+
+    # Failure injection must not skew the final count
+    if server is not None:
+        server.fail_rate = server.throttle_rate = 0.0
+    stored = stored_count(url, key, args.table, tag)
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+    latencies = stats.latencies
+    return {
+        "mode": mode,
+        "clients": args.clients,
+        "seconds": round(elapsed, 3),
+        "throughput": round(stored / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        "errors": stats.errors,
+        "retries": stats.retries,
+        "lost": max(0, len(records) - stored),
+        "duplicates": max(0, stored - len(records)),
+    }
+
+
+def print_report(report):
+    print(f"📊 {report['mode']:<8} {report['clients']} runs in {report['seconds']:.2f}s, "
+          f"{report['throughput']} records/s")
+    print(f"   latency p50 {report['p50_ms']} ms, p95 {report['p95_ms']} ms, p99 {report['p99_ms']} ms")
+    errors = ", ".join(f"{n}x {reason}" for reason, n in report["errors"].items()) or "none"
+    mark = "✅" if not report["lost"] else "❌"
+    print(f"   {mark} errors: {errors}, retries: {report['retries']}, "
+          f"lost: {report['lost']}, duplicates: {report['duplicates']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deadline-burst load test of grade ingestion")
+    parser.add_argument("--mode", choices=MODES + ("all",), default="all")
+    parser.add_argument("--clients", type=int, default=200, help="simulated CI runs")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which the runs start")
+    parser.add_argument("--pool-size", type=int, default=20, help="connections of the pooled client")
+    parser.add_argument("--writers", type=int, default=4, help="writer threads in batched mode")
+    parser.add_argument("--batch-size", type=int, default=100, help="max records per array insert")
+    parser.add_argument("--linger", type=float, default=0.05, help="seconds a writer waits to fill a batch")
+    parser.add_argument("--url", help="endpoint to test (default: an in-process fake_postgrest)")
+    parser.add_argument("--key", default="devkey")
+    parser.add_argument("--table", default="marks")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake server latency per request")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of fake 503 responses")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of fake 429 responses")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After of the fake 429 responses")
+    parser.add_argument("--json", help="write the JSON report to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    reports = [run_mode(mode, args) for mode in (MODES if args.mode == "all" else [args.mode])]
+
+    if args.json == "-":
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports:
+            print_report(report)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(reports, f, indent=2)
+
+    sys.exit(1 if any(r["lost"] for r in reports) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Durable local outbox for grade records that could not be inserted
+
+Failed payloads are spooled to a SQLite file and flushed later in bulk by
+`python update_sb.py --drain`. Each record is stored under a hash of its
+content, so spooling the same grade twice keeps a single copy. An entry the
+server rejects for its data, or that failed MAX_ATTEMPTS drains, moves to the
+dead_letter table, so a drain does not retry it forever.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+
+DEFAULT_PATH = os.environ.get(
+    'SUPABASE_OUTBOX',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'outbox.sqlite3')
+)
+
+MAX_ATTEMPTS = int(os.environ.get('SUPABASE_OUTBOX_MAX_ATTEMPTS', 5))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    key TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+CREATE TABLE IF NOT EXISTS dead_letter (
+    key TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+"""
+
+
+def record_key(record):
+    """Content hash identifying a record independently of key order"""
+    canonical = json.dumps(record, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class Outbox:
+    """SQLite spool of records waiting to be inserted"""
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_PATH
+        self.db = sqlite3.connect(self.path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+    def put(self, records, error=None):
+        """Spool records, ignoring the ones already waiting"""
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO outbox (key, payload, created_at, last_error) VALUES (?, ?, ?, ?)",
+                [(record_key(r), json.dumps(r), now, str(error) if error else None) for r in records]
+            )
+
+    def pending(self, after=0, limit=500):
+        """Oldest spooled entries as (rowid, key, record), starting after a rowid"""
+        rows = self.db.execute(
+            "SELECT rowid, key, payload FROM outbox WHERE rowid > ? ORDER BY rowid LIMIT ?",
+            (after, limit)
+        ).fetchall()
+        return [(rowid, key, json.loads(payload)) for rowid, key, payload in rows]
+
+    def remove(self, keys):
+        with self.db:
+            self.db.executemany("DELETE FROM outbox WHERE key = ?", [(k,) for k in keys])
+
+    def mark_failed(self, keys, error, retryable=True, max_attempts=MAX_ATTEMPTS):
+        """Count a failed attempt; dead-letter the entries past max_attempts, or all if not retryable"""
+        keys = list(keys)
+        limit = max_attempts if retryable else 0
+        with self.db:
+            self.db.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, last_error = ? WHERE key = ?",
+                [(str(error), k) for k in keys]
+            )
+            self.db.executemany(
+                "INSERT OR REPLACE INTO dead_letter SELECT key, payload, created_at, attempts, last_error "
+                "FROM outbox WHERE key = ? AND attempts >= ?",
+                [(k, limit) for k in keys]
+            )
+            self.db.executemany("DELETE FROM outbox WHERE key = ? AND attempts >= ?", [(k, limit) for k in keys])
+
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def dead_count(self):
+        return self.db.execute("SELECT COUNT(*) FROM dead_letter").fetchone()[0]
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Per-test failure analytics over the outcomes column of the marks table
+
+Usage:
+    python outcome_analytics.py rates [--top 20] [--all-runs]
+    python outcome_analytics.py clusters -k 4 [--all-runs]
+    python outcome_analytics.py matrix outcomes.npz     # repos x tests status codes
+
+Only the id, repo and outcomes columns are fetched (keyset pages, see
+export_marks.py), and by default only the latest run of each repo is kept.
+Rows sharing a suite digest are decoded together: their packed codes are
+concatenated and unpacked with a single numpy operation per encoding into a
+(rows x tests) uint8 matrix of positions in outcomes.STATUSES. Failure rates
+are column means of that matrix; clusters are k-means over its failed/passed
+rows, so students who fail the same tests end up together. The test names
+come from the test_suites table (`#<index>` when the suite was not registered).
+"""
+import os
+import sys
+import base64
+import argparse
+import numpy as np
+from sb_client import SupabaseClient
+from update_sb import SUITES_TABLE
+from export_marks import fetch_pages
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'REPO-TEMPLATE', '.python'))
+from outcomes import STATUSES, FAILED, NIBBLES, RUNS
+
+
+FAILED_CODES = [STATUSES.index(c) for c in FAILED]
+
+
+def fetch_outcomes(client, latest=True, page_size=1000):
+    """Rows with outcomes, only the latest one of each repo if asked"""
+    rows = [
+        row for page in fetch_pages(client, ["id", "repo", "outcomes"], page_size)
+        for row in page if row.get("outcomes")
+    ]
+    if latest:
+        # Pages come in id order, so the last row seen for a repo is its latest
+        rows = list({row["repo"]: row for row in rows}.values())
+    return rows
+
+
+def suite_ids(client, suite, size):
+    """Test names of a suite, or index labels when it is not registered"""
+    response = client.get(SUITES_TABLE, params={"select": "ids", "suite": f"eq.{suite}"})
+    if response.ok and response.json():
+        ids = response.json()[0]["ids"]
+        if len(ids) == size:
+            return ids
+    return [f"#{i}" for i in range(size)]
+
+
+def decode_matrix(outcomes):
+    """(rows x tests) uint8 matrix of status codes, from outcomes of one suite
+
+    Every row decodes to the same number of codes, so all rows of an encoding
+    are unpacked at once and reshaped.
+    """
+    size = outcomes[0]["n"]
+    matrix = np.zeros((len(outcomes), size), dtype=np.uint8)
+    for scheme in (NIBBLES, RUNS):
+        picked = [i for i, o in enumerate(outcomes) if o["codes"][0] == scheme]
+        if not picked or not size:
+            continue
+        packed = np.frombuffer(
+            b"".join(base64.b64decode(outcomes[i]["codes"][1:]) for i in picked), dtype=np.uint8
+        )
+        if scheme == NIBBLES:
+            codes = np.stack((packed & 15, packed >> 4), axis=1).reshape(len(picked), -1)[:, :size]
+        else:
+            codes = np.repeat(packed & 7, (packed >> 3).astype(np.int64) + 1).reshape(len(picked), size)
+        matrix[picked] = codes
+    return matrix
+
+
+def suite_matrices(rows):
+    """{suite: (rows of the suite, matrix)}, largest suite first"""
+    suites = {}
+    for row in rows:
+        suites.setdefault(row["outcomes"]["suite"], []).append(row)
+    return {
+        suite: (members, decode_matrix([row["outcomes"] for row in members]))
+        for suite, members in sorted(suites.items(), key=lambda item: -len(item[1]))
+    }
+
+
+def failure_rates(matrix):
+    """Fraction of rows failing each test, and per-status counts (tests x STATUSES)"""
+    failed = np.isin(matrix, FAILED_CODES)
+    counts = np.stack([np.count_nonzero(matrix == code, axis=0) for code in range(len(STATUSES))], axis=1)
+    return failed.mean(axis=0), counts
+
+
+def kmeans(points, k, iterations=100, seed=0):
+    """(labels, centers) of k-means on the rows of points, k-means++ seeding"""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(points))
+    centers = points[[rng.integers(len(points))]]
+    while len(centers) < k:
+        distances = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+        total = distances.sum()
+        choice = rng.choice(len(points), p=distances / total) if total else rng.integers(len(points))
+        centers = np.vstack((centers, points[choice]))
+
+    labels = np.full(len(points), -1)
+    squares = (points ** 2).sum(axis=1)
+    for _ in range(iterations):
+        # |x - c|^2 = |x|^2 - 2 x.c + |c|^2 for every (row, center) pair at once
+        distances = squares[:, None] - 2 * points @ centers.T + (centers ** 2).sum(axis=1)[None, :]
+        new_labels = distances.argmin(axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        sizes = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, points)
+        # An empty cluster keeps its center
+        centers = np.where(sizes[:, None] > 0, sums / np.maximum(sizes, 1)[:, None], centers)
+    return labels, centers
+
+
+def print_rates(ids, rows, matrix, top):
+    rates, counts = failure_rates(matrix)
+    order = np.argsort(-rates, kind="stable")[:top]
+    print(f"📊 {len(rows)} runs x {matrix.shape[1]} tests, {np.count_nonzero(rates)} tests failed at least once")
+    print(f"   {'test':<40} {'failed':>7} " + " ".join(f"{c:>4}" for c in STATUSES))
+    for i in order:
+        print(f"   {ids[i][:40]:<40} {rates[i]:>6.1%} " + " ".join(f"{n:>4}" for n in counts[i])
+              + f" {'█' * int(20 * rates[i])}")
+
+
+def print_clusters(ids, rows, matrix, k):
+    failed = np.isin(matrix, FAILED_CODES).astype(float)
+    labels, centers = kmeans(failed, k)
+    print(f"🧩 {len(rows)} runs in {len(centers)} clusters of failed tests")
+    for cluster in np.argsort(-np.bincount(labels, minlength=len(centers))):
+        members = np.flatnonzero(labels == cluster)
+        if not len(members):
+            continue
+        common = [i for i in np.argsort(-centers[cluster], kind="stable") if centers[cluster][i] >= 0.5]
+        print(f"\n   cluster {cluster}: {len(members)} runs, {failed[members].sum(axis=1).mean():.1f} failed tests on average")
+        print("   mostly failing: " + (", ".join(ids[i] for i in common[:8]) + (" ..." if len(common) > 8 else "")
+                                      if common else "none"))
+        print("   repos: " + ", ".join(rows[i]["repo"] for i in members[:5]) + (" ..." if len(members) > 5 else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-test failure analytics over the marks table")
+    parser.add_argument("command", choices=["rates", "clusters", "matrix"])
+    parser.add_argument("output", nargs="?", help="matrix: output .npz file")
+    parser.add_argument("--all-runs", action="store_true", help="every run, not only the latest per repo")
+    parser.add_argument("--suite", help="suite digest (default: the suite with the most runs)")
+    parser.add_argument("--top", type=int, default=20, help="rates: tests listed")
+    parser.add_argument("-k", "--clusters", type=int, default=4, help="clusters: number of clusters")
+    args = parser.parse_args()
+
+    if args.command == "matrix" and not args.output:
+        parser.error("matrix needs an output file")
+
+    with SupabaseClient() as client:
+        suites = suite_matrices(fetch_outcomes(client, latest=not args.all_runs))
+        if not suites:
+            print("No row has per-test outcomes yet")
+            sys.exit(1)
+        if args.suite and args.suite not in suites:
+            print(f"Unknown suite {args.suite}, known: {', '.join(suites)}")
+            sys.exit(1)
+        suite = args.suite or next(iter(suites))
+        rows, matrix = suites[suite]
+        ids = suite_ids(client, suite, matrix.shape[1])
+
+    if len(suites) > 1:
+        print(f"Suite {suite} ({len(suites) - 1} other suite(s), see --suite)")
+    if args.command == "rates":
+        print_rates(ids, rows, matrix, args.top)
+    elif args.command == "clusters":
+        print_clusters(ids, rows, matrix, args.clusters)
+    else:
+        np.savez_compressed(args.output, codes=matrix, tests=np.array(ids),
+                            repos=np.array([row["repo"] for row in rows]), row_ids=np.array([row["id"] for row in rows]))
+        print(f"✅ {matrix.shape[0]} x {matrix.shape[1]} matrix → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
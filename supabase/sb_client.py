@@ -0,0 +1,110 @@
+"""
+Shared HTTP client for the Supabase scripts
+
+One keep-alive session per process: connections are pooled, the apikey and
+Authorization headers are built once, every request has a timeout and
+5xx/connection errors are retried with exponential backoff. A POST is only
+replayed when it cannot have been applied: connection failures, 429 and 503.
+"""
+import os
+import json
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+DEFAULT_TIMEOUT = (5, 30)  # (connect, read) in seconds
+RETRY_STATUS = (429, 500, 502, 503, 504)
+# Answers sent before the write was attempted; a read timeout, 502 or 504 can
+# follow a committed insert, and replaying a plain insert would duplicate it
+POST_RETRY_STATUS = (429, 503)
+
+
+class WriteSafeRetry(Retry):
+    """Retry policy replaying a POST only on POST_RETRY_STATUS
+
+    POST is left out of allowed_methods, so read errors never replay it;
+    connection errors are retried for every method, as no byte was sent.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method.upper() == "POST":
+            return bool(self.total) and status_code in POST_RETRY_STATUS
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def make_session(key, retries=3, backoff=0.5, pool_size=10):
+    """Build a pooled session with auth headers and retry policy"""
+    retry = WriteSafeRetry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(["GET", "HEAD", "OPTIONS"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "apikey": key,
+        "Authorization": f"Bearer {key}",
+    })
+    return session
+
+
+class SupabaseClient:
+    """Thin wrapper around a pooled session for the PostgREST endpoint"""
+
+    def __init__(self, url=None, key=None, table=None, timeout=DEFAULT_TIMEOUT,
+                 retries=3, backoff=0.5, pool_size=10):
+        self.url = (url or os.environ['SUPABASE_URL']).rstrip('/')
+        self.key = key or os.environ['SUPABASE_KEY']
+        # An unset GitHub secret is passed as an empty string
+        self.table = table or os.environ.get('SUPABASE_TABLE') or 'marks'
+        self.timeout = timeout
+        self.session = make_session(self.key, retries, backoff, pool_size)
+
+    def rest_url(self, path=""):
+        """Full URL of a path under /rest/v1/"""
+        return f"{self.url}/rest/v1/{path}"
+
+    def request(self, method, path="", **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, self.rest_url(path), **kwargs)
+
+    def get(self, path="", **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, payload, prefer="return=representation", **kwargs):
+        headers = {"Content-Type": "application/json", "Prefer": prefer}
+        headers.update(kwargs.pop("headers", {}))
+        return self.request("POST", path, data=json.dumps(payload), headers=headers, **kwargs)
+
+    def select(self, table=None, query="select=*&limit=1", **kwargs):
+        """GET rows of a table with a raw PostgREST query string"""
+        return self.get(f"{table or self.table}?{query}", **kwargs)
+
+    def insert(self, payload, table=None, prefer="return=representation", **kwargs):
+        """POST a record, or a list of records as one array insert"""
+        return self.post(table or self.table, payload, prefer=prefer, **kwargs)
+
+    def upsert(self, payload, on_conflict, table=None, prefer="return=representation",
+               resolution="ignore-duplicates", **kwargs):
+        """POST records, skipping (or merging) rows that clash on the on_conflict columns"""
+        path = f"{table or self.table}?on_conflict={on_conflict}"
+        return self.post(path, payload, prefer=f"resolution={resolution},{prefer}", **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
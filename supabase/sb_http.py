@@ -0,0 +1,55 @@
+"""
+HTTP plumbing shared by the local PostgREST front ends
+
+fake_postgrest.py and grade_relay.py both answer the requests of
+sb_client.py: JSON bodies on keep-alive connections, records as one object or
+an array, and options in the Prefer header (`resolution=...,return=...`).
+"""
+import json
+from http.server import BaseHTTPRequestHandler
+
+
+def prefer_options(header):
+    """{option: value} of a Prefer header, e.g. {"resolution": "ignore-duplicates"}"""
+    return dict(p.split("=", 1) for p in (header or "").replace(" ", "").split(",") if "=" in p)
+
+
+def parse_records(body):
+    """Records of a POST body (one object or an array of objects), or ValueError"""
+    try:
+        payload = json.loads(body or b"null")
+    except ValueError:
+        raise ValueError("invalid JSON body") from None
+    records = payload if isinstance(payload, list) else [payload]
+    if not all(isinstance(record, dict) for record in records):
+        raise ValueError("body must be an object or an array of objects")
+    return records
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    """Request handler answering JSON, for servers with a `verbose` attribute"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, as the pooled client expects
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def read_body(self):
+        # Always read the body, so the connection can be reused
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def send_json(self, status, body=None, headers=None):
+        data = b"" if body is None else body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        self.sent(status)
+
+    def sent(self, status):
+        """Called after each answer"""
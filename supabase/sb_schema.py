@@ -0,0 +1,175 @@
+"""
+Cached table schema and client-side payload validation
+
+The OpenAPI document of the PostgREST endpoint is cached on disk and
+revalidated with ETag/If-None-Match, so a run usually costs one 304 (or no
+request at all while the cache is fresh). Payloads are checked and coerced
+against it before any POST: a `run_number` sent as "42" becomes 42, and a
+value that cannot fit its column is rejected locally instead of costing a
+round trip and a 422.
+"""
+import os
+import json
+import time
+import tempfile
+
+
+DEFAULT_PATH = os.environ.get(
+    'SUPABASE_SCHEMA_CACHE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema_cache.json')
+)
+MAX_AGE = 3600  # seconds during which the cache is used without revalidation
+
+INTEGER_RANGES = {
+    "smallint": (-2 ** 15, 2 ** 15 - 1),
+    "integer": (-2 ** 31, 2 ** 31 - 1),
+    "bigint": (-2 ** 63, 2 ** 63 - 1),
+}
+
+
+class SchemaError(ValueError):
+    """A payload does not match the table schema"""
+
+
+def load_cache(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_cache(path, cache):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+    os.replace(tmp, path)
+
+
+def fetch_schema(client, path=DEFAULT_PATH, max_age=MAX_AGE):
+    """OpenAPI document of the endpoint, from the disk cache when still valid
+
+    Falls back to a stale cache if the endpoint cannot be reached.
+    """
+    cache = load_cache(path)
+    if cache is not None and cache.get("url") != client.url:
+        cache = None
+    if cache is not None and time.time() - cache.get("checked_at", 0) < max_age:
+        return cache["document"]
+
+    headers = {"Accept": "application/openapi+json"}
+    if cache is not None and cache.get("etag"):
+        headers["If-None-Match"] = cache["etag"]
+    try:
+        response = client.get(headers=headers)
+    except Exception:
+        if cache is not None:
+            return cache["document"]
+        raise
+
+    if response.status_code == 304 and cache is not None:
+        cache["checked_at"] = time.time()
+    elif response.status_code == 200:
+        cache = {
+            "url": client.url,
+            "etag": response.headers.get("ETag"),
+            "checked_at": time.time(),
+            "document": response.json(),
+        }
+    elif cache is not None:
+        return cache["document"]
+    else:
+        response.raise_for_status()
+
+    try:
+        save_cache(path, cache)
+    except OSError:
+        pass
+    return cache["document"]
+
+
+def table_definition(document, table):
+    definition = document.get("definitions", {}).get(table)
+    if definition is None:
+        raise SchemaError(f"table '{table}' not found in schema")
+    return definition
+
+
+def coerce_value(column, value, spec):
+    """Value converted to the column type, or SchemaError"""
+    if value is None:
+        return None
+    kind = spec.get("type")
+    fmt = spec.get("format", "")
+    try:
+        if kind == "integer":
+            if isinstance(value, bool):
+                raise ValueError("boolean")
+            number = float(value) if isinstance(value, str) else value
+            if number != int(number):
+                raise ValueError("not an integer")
+            value = int(number)
+            low, high = INTEGER_RANGES.get(fmt, INTEGER_RANGES["bigint"])
+            if not low <= value <= high:
+                raise ValueError(f"out of {fmt} range")
+            return value
+        if kind == "number":
+            if isinstance(value, bool):
+                raise ValueError("boolean")
+            return float(value)
+        if kind == "boolean":
+            if isinstance(value, str) and value.lower() in ("true", "false"):
+                return value.lower() == "true"
+            if not isinstance(value, bool):
+                raise ValueError("not a boolean")
+            return value
+        if kind == "string" and not fmt.startswith("json") and not fmt.startswith("timestamp"):
+            if isinstance(value, (dict, list)):
+                raise ValueError("not a string")
+            return str(value)
+    except (TypeError, ValueError) as e:
+        raise SchemaError(f"{column}={value!r} does not fit {fmt or kind}: {e}") from None
+    return value
+
+
+def has_default(spec):
+    """True for columns the database fills in (default value or primary key)"""
+    return "default" in spec or "<pk/>" in spec.get("description", "")
+
+
+def coerce_record(record, definition):
+    """Copy of record coerced to the table definition, or SchemaError"""
+    properties = definition.get("properties", {})
+    unknown = [column for column in record if column not in properties]
+    if unknown:
+        raise SchemaError(f"unknown column(s): {', '.join(unknown)}")
+    missing = [
+        column for column in definition.get("required", [])
+        if record.get(column) is None and not has_default(properties.get(column, {}))
+    ]
+    if missing:
+        raise SchemaError(f"missing required column(s): {', '.join(missing)}")
+    return {column: coerce_value(column, value, properties[column]) for column, value in record.items()}
+
+
+def validate_records(records, definition):
+    """Split records into (coerced valid records, [(record, SchemaError)])"""
+    valid, rejected = [], []
+    for record in records:
+        try:
+            valid.append(coerce_record(record, definition))
+        except SchemaError as e:
+            rejected.append((record, e))
+    return valid, rejected
+
+
+def load_definition(client, table=None):
+    """Definition of a table from the cached schema, or None if it is unavailable"""
+    try:
+        return table_definition(fetch_schema(client), table or client.table)
+    except SchemaError:
+        raise
+    except Exception as e:
+        print(f"Schema unavailable, payloads not validated: {e}")
+        return None
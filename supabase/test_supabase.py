@@ -1,6 +1,5 @@
 import os
-import json
-import requests
+from sb_client import SupabaseClient
 
 # Set your Supabase credentials here or use environment variables
 SUPABASE_URL = os.environ.get('SUPABASE_URL', 'https://antsdkjhthaihqhvnvfw.supabase.co')
@@ -28,19 +27,10 @@ payload = {
     'repo': 'local/repo',
 }
 
-headers = {
-    'apikey': SUPABASE_KEY,
-    'Authorization': f'Bearer {SUPABASE_KEY}',
-    'Content-Type': 'application/json',
-    'Prefer': 'return=representation',
-}
+client = SupabaseClient(SUPABASE_URL, SUPABASE_KEY, SUPABASE_TABLE)
 
 try:
-    response = requests.post(
-        f"{SUPABASE_URL}/rest/v1/{SUPABASE_TABLE}",
-        headers=headers,
-        data=json.dumps(payload)
-    )
+    response = client.insert(payload)
     response.raise_for_status()
     print('Record inserted:', response.json())
 except Exception as e:
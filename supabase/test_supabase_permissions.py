@@ -4,9 +4,9 @@ Test script to verify Supabase key type and write permissions
 """
 import os
 import json
-import requests
 import base64
 from datetime import datetime
+from sb_client import SupabaseClient
 
 
 def decode_jwt_payload(token):
@@ -41,6 +41,8 @@ def test_supabase_connection():
         print("❌ Missing SUPABASE_URL or SUPABASE_KEY environment variables")
         return False
     
+    client = SupabaseClient(supabase_url, supabase_key, supabase_table)
+
     print(f"🔗 Supabase URL: {supabase_url}")
     print(f"📋 Table: {supabase_table}")
     print(f"🔑 Key (first 20 chars): {supabase_key[:20]}...")
@@ -67,14 +69,7 @@ def test_supabase_connection():
     # Test basic connection
     print("\n🔌 Testing basic connection...")
     try:
-        response = requests.get(
-            f"{supabase_url}/rest/v1/",
-            headers={
-                "apikey": supabase_key,
-                "Authorization": f"Bearer {supabase_key}"
-            },
-            timeout=10
-        )
+        response = client.get()
         if response.status_code == 200:
             print("   ✅ Basic connection successful")
         else:
@@ -87,14 +82,7 @@ def test_supabase_connection():
     # Test table read access
     print(f"\n📖 Testing read access to '{supabase_table}' table...")
     try:
-        response = requests.get(
-            f"{supabase_url}/rest/v1/{supabase_table}?select=*&limit=1",
-            headers={
-                "apikey": supabase_key,
-                "Authorization": f"Bearer {supabase_key}"
-            },
-            timeout=10
-        )
+        response = client.select()
         if response.status_code == 200:
             print("   ✅ Read access successful")
             data = response.json()
@@ -120,17 +108,7 @@ def test_supabase_connection():
     }
     
     try:
-        response = requests.post(
-            f"{supabase_url}/rest/v1/{supabase_table}",
-            headers={
-                "apikey": supabase_key,
-                "Authorization": f"Bearer {supabase_key}",
-                "Content-Type": "application/json",
-                "Prefer": "return=representation"
-            },
-            data=json.dumps(test_data),
-            timeout=10
-        )
+        response = client.insert(test_data)
         
         if response.status_code in [200, 201]:
             print("   ✅ Write access successful!")
@@ -1,10 +1,26 @@
 import os
 import sys
 import json
-import requests
+import time
+from sb_client import SupabaseClient
+from outbox import Outbox, MAX_ATTEMPTS, record_key
+from sb_schema import SchemaError, load_definition, coerce_record, validate_records
 
 
-def main(pytest_score, pytest_string, pylint_score):
+DEFAULT_CHUNK_SIZE = 500
+# Unique key of a grading run: a re-run or a replayed insert adds no row
+CONFLICT_COLUMNS = "repo,sha,run_number"
+ROW_ERROR_STATUS = (400, 409, 422)  # caused by the data of some row
+# ...except this 400: the table lacks the unique key of CONFLICT_COLUMNS (migration not run yet)
+MISSING_CONSTRAINT = '42P10'
+# Test ids of each suite, keyed by the digest the outcomes column refers to
+SUITES_TABLE = os.environ.get('SUPABASE_SUITES_TABLE', 'test_suites')
+# Columns added by later migrations: a table without them still takes the grade
+OPTIONAL_COLUMNS = ('perf_score', 'perf_timings', 'timings', 'outcomes')
+
+
+def main(pytest_score, pytest_string, pylint_score, perf_score=None, perf_timings=None, timings=None,
+         outcomes=None, test_ids=None):
     print("start updating db")
 
     github_sha = os.environ['GITHUB_SHA']
@@ -12,9 +28,7 @@ def main(pytest_score, pytest_string, pylint_score):
     github_actor = os.environ['GITHUB_ACTOR']
     github_repository = os.environ['GITHUB_REPOSITORY']
 
-    supabase_url = os.environ['SUPABASE_URL']
-    supabase_key = os.environ['SUPABASE_KEY']
-    supabase_table = os.environ.get('SUPABASE_TABLE', 'marks')  # default to 'ci_data'
+    client = SupabaseClient()
 
     print(f"{github_sha=}")
     print(f"{github_run_number=}")
@@ -30,30 +44,261 @@ def main(pytest_score, pytest_string, pylint_score):
         'run_number': github_run_number,
         'repo': github_repository,
     }
+    if perf_score is not None:
+        data['perf_score'] = perf_score
+        data['perf_timings'] = perf_timings
+    if timings is not None:
+        data['timings'] = timings
+    if outcomes is not None:
+        data['outcomes'] = outcomes
 
     try:
-        response = requests.post(
-            f"{supabase_url}/rest/v1/{supabase_table}",
-            headers={
-                "apikey": supabase_key,
-                "Authorization": f"Bearer {supabase_key}",
-                "Content-Type": "application/json",
-                "Prefer": "return=representation"
-            },
-            data=json.dumps(data)
-        )
+        # A table missing from the schema (wrong SUPABASE_TABLE) is a SchemaError too
+        definition = load_definition(client)
+        if definition is not None:
+            data = coerce_record(without_missing_columns(data, definition, client.table), definition)
+    except SchemaError as e:
+        print("Invalid record, not inserted:", e)
+        sys.exit(1)
+
+    if 'outcomes' in data and test_ids is not None:
+        register_suite(client, outcomes['suite'], test_ids)
+
+    try:
+        start = time.perf_counter()
+        response = client.upsert(data, CONFLICT_COLUMNS)
         response.raise_for_status()
-        print("Record inserted:", response.json())
+        print(f"Upsert took {(time.perf_counter() - start) * 1000:.0f} ms")
+        if response.status_code == 202:
+            # SUPABASE_URL points at grade_relay.py, which writes it with the next batch
+            print("Record accepted by the relay")
+            print("end updating db")
+            return
+        inserted = response.json()
+        if inserted:
+            print("Record inserted:", inserted)
+        else:
+            print("Record already present for this run, nothing inserted")
     except Exception as e:
         print("Error inserting record:", e)
+        if is_retryable(e):
+            spool([data], e)
+        else:
+            print("Record rejected by the server, not queued")
         sys.exit(1)
 
     print("end updating db")
 
 
+def without_missing_columns(record, definition, table):
+    """Copy of record without the OPTIONAL_COLUMNS the table does not have yet"""
+    dropped = [column for column in OPTIONAL_COLUMNS
+               if column in record and column not in definition.get('properties', {})]
+    if dropped:
+        print(f"⚠️ {table} has no {', '.join(dropped)} column(s), sent without them (see the README migration)")
+    return {column: value for column, value in record.items() if column not in dropped}
+
+
+def register_suite(client, suite, test_ids):
+    """Store the test ids of a suite once, for the outcome analytics
+
+    A suite is almost always stored already: a GET of its digest alone
+    avoids sending thousands of ids on every run. The upsert, ignoring
+    duplicates, stays correct if two runs register the same new suite; it is
+    also used when the GET is refused (grade_relay.py serves no table).
+    A failure only costs the test names in the analytics, so it is not fatal.
+    """
+    try:
+        response = client.get(SUITES_TABLE, params={'select': 'suite', 'suite': f'eq.{suite}'})
+        if response.ok and response.json():
+            return
+        response = client.upsert({'suite': suite, 'ids': test_ids}, 'suite', table=SUITES_TABLE,
+                                 prefer='return=minimal')
+        response.raise_for_status()
+        print(f"Test suite {suite} registered ({len(test_ids)} tests)")
+    except Exception as e:
+        print(f"Test suite {suite} not registered:", e)
+
+
+def spool(records, error):
+    """Keep records in the local outbox so that a later drain inserts them"""
+    try:
+        with Outbox() as outbox:
+            outbox.put(records, error)
+        print(f"{len(records)} record(s) queued in the outbox, run 'python update_sb.py --drain' to retry")
+    except Exception as e:
+        print("Error writing to the outbox:", e)
+
+
+def is_retryable(error):
+    """True unless the server, or the schema check, rejected the data itself"""
+    if isinstance(error, SchemaError):
+        return False
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status == 400 and error_code(response) == MISSING_CONSTRAINT:
+        # Any record would fail the same way: keep it until the constraint exists
+        return True
+    return status not in ROW_ERROR_STATUS
+
+
+def error_code(response):
+    """PostgREST/Postgres error code of a response, None if it has none"""
+    try:
+        return response.json().get('code')
+    except (ValueError, AttributeError):
+        return None
+
+
+def read_records(stream):
+    """Read one JSON record per non-empty line"""
+    records = []
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            print(f"Skipping line {line_number}: {e}")
+    return records
+
+
+def post_chunk(client, chunk):
+    """POST a list of records as one PostgREST array upsert, ignoring duplicates"""
+    response = client.upsert(chunk, CONFLICT_COLUMNS, prefer="return=minimal")
+    response.raise_for_status()
+
+
+def insert_chunk(client, chunk):
+    """Insert a chunk, splitting it in halves on failure to isolate bad rows
+
+    PostgREST array inserts are atomic: one bad row rejects the whole chunk.
+    Errors that are not about the data (auth, network) fail the chunk as is.
+    Returns the list of (record, error) pairs that could not be inserted.
+    """
+    try:
+        post_chunk(client, chunk)
+        return []
+    except Exception as e:
+        if len(chunk) == 1 or is_retryable(e):
+            return [(record, e) for record in chunk]
+    middle = len(chunk) // 2
+    return insert_chunk(client, chunk[:middle]) + insert_chunk(client, chunk[middle:])
+
+
+def insert_batch(records, chunk_size=DEFAULT_CHUNK_SIZE, client=None):
+    """Insert many records as chunked array POSTs and report each chunk
+
+    Returns the list of (record, error) pairs that were rejected.
+    """
+    client = client or SupabaseClient()
+
+    rejected, invalid = [], []
+    definition = load_definition(client)
+    if definition is not None:
+        records, invalid = validate_records(records, definition)
+        rejected.extend(invalid)
+        for record, error in invalid:
+            print(f"   invalid {json.dumps(record)}: {error}")
+
+    chunks = [records[i:i + chunk_size] for i in range(0, len(records), chunk_size)]
+    for index, chunk in enumerate(chunks, 1):
+        failed = insert_chunk(client, chunk)
+        inserted = len(chunk) - len(failed)
+        status = "ok" if not failed else "partial" if inserted else "failed"
+        print(f"chunk {index}/{len(chunks)}: {status}, {inserted}/{len(chunk)} inserted")
+        for record, error in failed:
+            print(f"   rejected {json.dumps(record)}: {error}")
+        rejected.extend(failed)
+
+    total = len(records) + len(invalid)
+    print(f"{total - len(rejected)}/{total} records inserted")
+    return rejected
+
+
+def batch_main(source, chunk_size):
+    """Insert the JSONL records read from a file, or from stdin if source is '-'"""
+    if source == "-":
+        records = read_records(sys.stdin)
+    else:
+        with open(source, encoding="utf-8") as f:
+            records = read_records(f)
+
+    rejected = insert_batch(records, chunk_size)
+    retryable = [record for record, error in rejected if is_retryable(error)]
+    if retryable:
+        spool(retryable, "batch insert failed")
+    if rejected:
+        sys.exit(1)
+
+
+def drain(chunk_size=DEFAULT_CHUNK_SIZE, client=None):
+    """Flush the outbox in bulk; records that already reached the table are ignored by the upsert
+
+    Returns the number of records still waiting in the outbox.
+    """
+    client = client or SupabaseClient()
+    definition = load_definition(client)
+
+    with Outbox() as outbox:
+        print(f"{outbox.count()} record(s) in the outbox")
+        last_rowid = 0
+        while True:
+            entries = outbox.pending(after=last_rowid, limit=chunk_size)
+            if not entries:
+                break
+            last_rowid = entries[-1][0]
+            todo = {key: record for _, key, record in entries}
+            failed = {}
+            if definition is not None:
+                for key, record in list(todo.items()):
+                    try:
+                        todo[key] = coerce_record(without_missing_columns(record, definition, client.table),
+                                                  definition)
+                    except SchemaError as e:
+                        failed[key] = e
+                        del todo[key]
+            # Coercion may change a record, so map the inserted payloads back to outbox keys
+            outbox_keys = {record_key(record): key for key, record in todo.items()}
+            for record, error in insert_chunk(client, list(todo.values())) if todo else []:
+                failed[outbox_keys[record_key(record)]] = error
+            outbox.remove(key for key in todo if key not in failed)
+            for key, error in failed.items():
+                outbox.mark_failed([key], error, is_retryable(error))
+
+            print(f"drained {len(entries) - len(failed)}/{len(entries)} ({len(failed)} failed)")
+
+        remaining = outbox.count()
+        dead = outbox.dead_count()
+    print(f"{remaining} record(s) left in the outbox")
+    if dead:
+        print(f"{dead} record(s) in the outbox dead_letter table (rejected, or {MAX_ATTEMPTS} failed drains)")
+    return remaining
+
+
 if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print("Usage: python update_sb.py pytest_score pytest_string pylint_score")
+    if len(sys.argv) >= 2 and sys.argv[1] == "--batch":
+        if len(sys.argv) > 4:
+            print("Usage: python update_sb.py --batch [records.jsonl|-] [chunk_size]")
+            sys.exit(1)
+        source = sys.argv[2] if len(sys.argv) > 2 else "-"
+        chunk_size = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_CHUNK_SIZE
+        batch_main(source, chunk_size)
+        sys.exit(0)
+
+    if len(sys.argv) >= 2 and sys.argv[1] == "--drain":
+        chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_CHUNK_SIZE
+        sys.exit(1 if drain(chunk_size) else 0)
+
+    if len(sys.argv) not in (4, 5, 6, 7):
+        print("Usage: python update_sb.py pytest_score pytest_string pylint_score "
+              "[perf_score [perf_timings_json [timings_json]]]")
+        print("       python update_sb.py --batch [records.jsonl|-] [chunk_size]")
+        print("       python update_sb.py --drain [chunk_size]")
         sys.exit(1)
 
-    main(float(sys.argv[1]), sys.argv[2], float(sys.argv[3]))
\ No newline at end of file
+    perf_score = float(sys.argv[4]) if len(sys.argv) > 4 else None
+    perf_timings = json.loads(sys.argv[5]) if len(sys.argv) > 5 else None
+    timings = json.loads(sys.argv[6]) if len(sys.argv) > 6 else None
+    main(float(sys.argv[1]), sys.argv[2], float(sys.argv[3]), perf_score, perf_timings, timings)
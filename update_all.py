@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Concurrent version of update-all.sh
+
+Usage:
+    python update_all.py pull [-j N]
+    python update_all.py push [-j N] [-m "message"]
+
+Same actions as update-all.sh, on up to N repos at a time, with the time
+spent on each repo and a final report of changed, unchanged and failed repos.
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+BASE_DIR = "../repos/"
+COMMIT_MSG = "update"
+DEFAULT_JOBS = 8
+
+# Never block a worker on a credentials prompt
+GIT_ENV = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+
+
+def git(repo, *args):
+    return subprocess.run(["git", *args], cwd=repo, capture_output=True, text=True, env=GIT_ENV, check=False)
+
+
+def first_line(text):
+    return text.strip().splitlines()[0] if text.strip() else ""
+
+
+def push(repo, message):
+    """Add, commit and push; returns (status, message)"""
+    git(repo, "add", ".")
+    # Vérifier s'il y a des changements avant de commit
+    if git(repo, "diff", "--cached", "--quiet").returncode == 0:
+        return "unchanged", "⚪ Rien à committer"
+    for args in (("commit", "-m", message), ("push",)):
+        result = git(repo, *args)
+        if result.returncode != 0:
+            return "failed", f"❌ Erreur lors de git {args[0]} : {first_line(result.stderr)}"
+    return "changed", "✅ Ajouté, commité et poussé"
+
+
+def pull(repo):
+    """Pull; returns (status, message)"""
+    before = git(repo, "rev-parse", "HEAD").stdout.strip()
+    result = git(repo, "pull")
+    if result.returncode != 0:
+        return "failed", f"❌ Erreur lors de la récupération : {first_line(result.stderr)}"
+    after = git(repo, "rev-parse", "HEAD").stdout.strip()
+    if before != after:
+        return "changed", "✅ Changements récupérés"
+    return "unchanged", "⚪ Aucun changement à récupérer"
+
+
+def process(repo, action, message):
+    start = time.perf_counter()
+    try:
+        status, text = push(repo, message) if action == "push" else pull(repo)
+    except OSError as e:
+        status, text = "failed", f"❌ {e}"
+    return repo, status, text, time.perf_counter() - start
+
+
+def find_repos(base_dir):
+    return sorted(
+        name for name in os.listdir(base_dir)
+        if os.path.isdir(os.path.join(base_dir, name, ".git"))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pull or push every repo concurrently")
+    parser.add_argument("action", choices=["push", "pull"])
+    parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS, help=f"repos processed at once (default: {DEFAULT_JOBS})")
+    parser.add_argument("-m", "--message", default=COMMIT_MSG, help=f"commit message for push (default: {COMMIT_MSG!r})")
+    parser.add_argument("--base-dir", default=BASE_DIR, help=f"directory of repos (default: {BASE_DIR})")
+    args = parser.parse_args()
+
+    print(f"🚀 Action: {args.action}")
+
+    repos = find_repos(args.base_dir)
+    report = {"changed": [], "unchanged": [], "failed": []}
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = [
+            pool.submit(process, os.path.join(args.base_dir, repo), args.action, args.message)
+            for repo in repos
+        ]
+        for future in as_completed(futures):
+            repo, status, text, elapsed = future.result()
+            name = os.path.basename(repo)
+            print(f"📂 {name} ({elapsed:.1f}s) {text}")
+            report[status].append(name)
+
+    # Message final basé sur s'il y a eu des changements
+    print("")
+    print(f"⏱️  {len(repos)} dépôts en {time.perf_counter() - start:.1f}s")
+    for status, label in (("changed", "✅ Modifiés"), ("unchanged", "⚪ Inchangés"), ("failed", "❌ En erreur")):
+        names = sorted(report[status])
+        print(f"{label} ({len(names)}){': ' + ', '.join(names) if names else ''}")
+
+    print("")
+    if report["changed"]:
+        if args.action == "push":
+            print("🎉 Opération terminée ! Des changements ont été poussés vers les dépôts distants.")
+        else:
+            print("🎉 Opération terminée ! Des changements ont été récupérés depuis les dépôts distants.")
+    else:
+        if args.action == "push":
+            print("😴 Aucun changement à pousser. Tous les dépôts sont déjà à jour.")
+        else:
+            print("😴 Aucun changement à récupérer. Tous les dépôts sont déjà à jour.")
+
+    if report["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()